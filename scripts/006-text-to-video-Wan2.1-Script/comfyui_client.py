@@ -1,15 +1,163 @@
 import os
+import shutil
+import mmap
 import requests
 import json
+import orjson
+import websocket
 import time
 import logging
 import uuid
 import base64
-from urllib.parse import urlencode, urlparse, parse_qs
-from typing import Optional, Dict, Any, List, Tuple, Union, BinaryIO
+import threading
+import queue
+from collections import ChainMap, OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qs, quote_plus
+from requests.adapters import HTTPAdapter
+from requests_toolbelt.multipart.encoder import MultipartEncoder
+from urllib3.util.retry import Retry
+from typing import Optional, Dict, Any, List, Tuple, Union, BinaryIO, Iterator, Callable
 
 logger = logging.getLogger(__name__)
 
+# Description of each node in the text-to-video workflow, for status reporting
+_NODE_DESCRIPTIONS = {
+    "11": "Loading T5 encoder model",
+    "16": "Encoding text prompt",
+    "37": "Preparing latent space",
+    "39": "Setting up block swap",
+    "22": "Loading video model",
+    "38": "Loading VAE model",
+    "52": "Configuring tea cache",
+    "55": "Setting up video enhancement",
+    "27": "Generating frames with sampler",
+    "28": "Decoding video frames",
+    "30": "Combining frames into video"
+}
+
+# Percentage estimates for different stages
+_STAGE_PERCENTAGES = {
+    "11": 5,    # T5 encoder loading
+    "16": 10,   # Text encoding  
+    "37": 15,   # Latent space preparation
+    "39": 20,   # Block swap setup
+    "22": 25,   # Model loading
+    "38": 30,   # VAE loading
+    "52": 35,   # TeaCache configuration
+    "55": 40,   # Video enhancement setup
+    "27": 50,   # Frame generation (main work)
+    "28": 85,   # Decoding frames  
+    "30": 95,   # Combining into video
+}
+
+# The same tables keyed by integer node ID, for node IDs parsed from history outputs;
+# every workflow node gets a description so only nodes from other workflows need a fallback
+_NODE_DESCRIPTIONS_BY_ID = {
+    int(node_id): _NODE_DESCRIPTIONS.get(node_id, f"Step {node_id}")
+    for node_id in {"11", "16", "22", "27", "28", "30", "35", "37", "38", "39", "52", "55", *_NODE_DESCRIPTIONS}
+}
+_STAGE_PERCENTAGES_BY_ID = {int(node_id): pct for node_id, pct in _STAGE_PERCENTAGES.items()}
+
+# Progress range covered by frame generation (node 27)
+_GENERATING_PROGRESS_BASE = 40  # Start at 40% when frame generation begins
+_GENERATING_PROGRESS_MAX = 85   # Max at 85% before decoding
+_GENERATING_PROGRESS_RANGE = _GENERATING_PROGRESS_MAX - _GENERATING_PROGRESS_BASE
+
+# Time-based estimate of frame generation when no step progress is available
+_GENERATING_SETUP_SECONDS = 60      # Time spent loading models before sampling starts
+_GENERATING_DURATION_SECONDS = 240  # Typical sampling time for the whole range
+
+# Typical total run time, used for a time-based estimate when no node information is available
+_ESTIMATED_TOTAL_SECONDS = 600
+
+# Check /history if no WebSocket events have arrived for this long, in case one was missed
+WS_IDLE_CHECK_SECONDS = 30
+
+# History can lag the execution_success event, so an empty history is re-read this many times before giving up
+OUTPUT_HISTORY_RETRIES = 2
+OUTPUT_HISTORY_RETRY_DELAY = 1.0
+
+# File extensions downloaded through the video endpoint
+_VIDEO_EXTS = frozenset({".mp4", ".avi", ".mov", ".webm", ".mkv"})
+
+# Read size for streaming downloads to disk
+DOWNLOAD_BUFFER_SIZE = 1024 * 1024
+
+# Polling fallback interval: reset to the minimum when progress changes, otherwise backed off up to the maximum.
+# History stays empty until the prompt finishes, so the maximum also bounds how late completion is noticed.
+POLL_INTERVAL_MIN = 2.0
+POLL_INTERVAL_MAX = 8.0
+POLL_BACKOFF_FACTOR = 1.5
+
+# Number of finished prompts whose final status is remembered
+TERMINAL_CACHE_SIZE = 256
+
+# Inputs that must be present on API-format nodes, by node class
+_REQUIRED_NODE_INPUTS = {
+    "WanVideoTorchCompileSettings": ("compile_transformer_blocks_only", "dynamic", "dynamo_cache_size_limit"),
+    "WanVideoEnhanceAVideo": ("start_percent", "weight", "end_percent"),
+    "WanVideoDecode": ("enable_vae_tiling",),
+}
+
+# Mapping of visual-format widgets_values to API inputs, by node type:
+# (input name per widget position, minimum number of widgets, default inputs).
+# A None name skips that widget position.
+_WIDGET_SCHEMA = {
+    "WanVideoTextEncode": (
+        ("positive_prompt", "negative_prompt", "force_zeros"),
+        2,
+        {"force_zeros": True}
+    ),
+    "WanVideoBlockSwap": (
+        ("blocks_to_swap", "offload_txt_emb", "offload_img_emb", "non_blocking", "vace_blocks_to_swap"),
+        5,
+        {}
+    ),
+    "WanVideoEmptyEmbeds": (
+        ("width", "height", "num_frames"),
+        3,
+        {}
+    ),
+    "WanVideoTorchCompileSettings": (
+        ("backend", "fullgraph", "mode", "max_autotune", "max_autotune_gemm_backends",
+         "use_fp16_cast", "max_autotune_gemm_warmup"),
+        7,
+        {"compile_transformer_blocks_only": False, "dynamic": False, "dynamo_cache_size_limit": 64}
+    ),
+    "WanVideoTeaCache": (
+        ("start_step", "end_step", "rel_l1_thresh", "cache_device", "use_coefficients", "coeff_mode"),
+        6,
+        {}
+    ),
+    "WanVideoEnhanceAVideo": (
+        ("enhance_factor", "enhance_start", "enhance_end"),
+        3,
+        {"start_percent": 0, "end_percent": 1, "weight": 1}  # Required fields missing from the widgets
+    ),
+    "WanVideoSampler": (
+        ("steps", "cfg", "shift", "seed", "sampler_name", "diffusion_type", "scheduler",
+         "riflex_freq_index", None, None, "implementation"),
+        10,
+        {"implementation": "comfy"}
+    ),
+    "WanVideoDecode": (
+        ("restore_faces", "tile_x", "tile_y", "tile_stride_x", "tile_stride_y"),
+        5,
+        {"enable_vae_tiling": True}  # Required field missing from the widgets
+    ),
+    "WanVideoVAELoader": (
+        ("model_name", "precision"),
+        2,
+        {}
+    ),
+    "WanVideoModelLoader": (
+        ("model", "base_precision", "quantization", "load_device", "attention_implementation"),
+        5,
+        {}
+    ),
+}
+
 class ComfyUIClient:
     """Client for interacting with ComfyUI API through Comput3"""
     
@@ -18,14 +166,42 @@ class ComfyUIClient:
         self.server_url = server_url.rstrip('/')
         self.original_server_url = self.server_url  # Keep the original URL for direct access
         self.api_key = api_key
-        self.client_id = self._get_client_id()
+        # Headers and endpoint URLs only depend on the key and server, so build them once
+        self._api_headers = self._get_headers()
+        self._video_headers = self._get_video_headers()
+        self._view_url = f"{self.server_url}/api/view"
+        self._viewvideo_url = f"{self.server_url}/api/viewvideo"
         self.session = self._create_session()
+        self.client_id = self._get_client_id()
+        self._events_lock = threading.Lock()
+        self._prompt_events: Dict[str, List[Dict[str, Any]]] = {}
+        self._prompt_signals: Dict[str, threading.Event] = {}
+        self._sse_supported: Optional[bool] = None  # Unknown until the event stream is tried
+        self._history_cache: Dict[str, Dict[str, Any]] = {}
+        self._executor = ThreadPoolExecutor(max_workers=2)  # Runs status requests concurrently while polling
+        self._cb_executor = ThreadPoolExecutor(max_workers=1)  # Runs status callbacks off the waiting thread
+        self._status_lock = threading.Lock()
+        self._pending_status: Optional[Tuple[Callable[[str], Any], str]] = None
+        self._terminal: "OrderedDict[str, Tuple[bool, Optional[Dict], Optional[str]]]" = OrderedDict()
+        self.ws = None
+        self._ws_supported = self._open_ws()  # Only worth reconnecting if the server accepted a socket once
         logger.info(f"🔌 Initialized ComfyUIClient with server URL: {self.server_url}")
     
     def _create_session(self) -> requests.Session:
-        """Create a session with persistent cookies for authentication"""
+        """Create a pooled keep-alive session with persistent cookies for authentication"""
         session = requests.Session()
-        session.headers.update(self._get_headers())
+        session.headers.update(self._api_headers)
+        session.headers["Connection"] = "keep-alive"
+        
+        # Reuse connections across the polling and download requests, and retry idempotent
+        # requests on transient gateway errors (POSTs are retried by queue_workflow itself)
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504], raise_on_status=False)
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
         
         # Set API key as cookie for authentication
         session.cookies.set("c3_api_key", self.api_key, domain=urlparse(self.server_url).netloc)
@@ -36,12 +212,9 @@ class ComfyUIClient:
         """Get a client ID from the server or generate one if the endpoint doesn't exist"""
         try:
             # Try to get a client ID from the server
-            response = requests.get(
-                f"{self.server_url}/prompt/get_client_id",
-                headers=self._get_headers()
-            )
+            response = self.session.get(f"{self.server_url}/prompt/get_client_id")
             if response.status_code == 200:
-                return response.json()["client_id"]
+                return self._json(response)["client_id"]
             
             # If the endpoint doesn't exist (404), generate our own client ID
             return str(uuid.uuid4())
@@ -49,6 +222,40 @@ class ComfyUIClient:
             logger.warning(f"⚠️ Failed to get client ID: {str(e)}")
             return str(uuid.uuid4())
     
+    def _connect_websocket(self) -> Optional[websocket.WebSocket]:
+        """Open a WebSocket to ComfyUI for pushed execution events, or None if unavailable"""
+        parsed_url = urlparse(self.server_url)
+        ws_scheme = "wss" if parsed_url.scheme == "https" else "ws"
+        ws_url = f"{ws_scheme}://{parsed_url.netloc}{parsed_url.path}/ws?clientId={self.client_id}"
+        
+        try:
+            ws = websocket.create_connection(
+                ws_url,
+                header=[f"X-C3-API-KEY: {self.api_key}"],
+                cookie=f"c3_api_key={self.api_key}",
+                timeout=10
+            )
+            logger.info("🔌 Connected to ComfyUI WebSocket for status updates")
+            return ws
+        except Exception as e:
+            logger.warning(f"⚠️ WebSocket unavailable, will poll for status instead: {str(e)}")
+            return None
+    
+    def _open_ws(self) -> bool:
+        """Connect the WebSocket and start the background event reader, returning whether it connected"""
+        ws = self._connect_websocket()
+        if ws is None:
+            return False
+        
+        ws.settimeout(None)
+        self.ws = ws
+        threading.Thread(target=self._read_websocket_events, args=(ws,), daemon=True).start()
+        return True
+    
+    def _json(self, response: requests.Response) -> Any:
+        """Decode a JSON response body with orjson"""
+        return orjson.loads(response.content)
+    
     def _get_headers(self) -> Dict[str, str]:
         """Get headers with Comput3 API key"""
         return {
@@ -90,18 +297,26 @@ class ComfyUIClient:
         
         try:
             with open(file_path, 'rb') as f:
-                files = {'image': (filename, f)}
-                data = {'type': file_type}
+                # Stream the multipart body from the file instead of building it in memory
+                encoder = MultipartEncoder(fields={
+                    'image': (filename, f),
+                    'type': file_type
+                })
                 
-                response = requests.post(upload_url, files=files, data=data, headers=self._get_headers())
-                
-                if response.status_code == 200:
-                    response_data = response.json()
-                    logger.info(f"✅ File uploaded successfully: {response_data.get('name')}")
-                    return response_data.get('name')
-                else:
-                    logger.error(f"❌ Upload failed: {response.status_code} - {response.text}")
-                    return None
+                response = self.session.post(
+                    upload_url,
+                    data=encoder,
+                    headers={'Content-Type': encoder.content_type}
+                )
+            
+            # The file is closed before the response is handled
+            if response.status_code == 200:
+                response_data = self._json(response)
+                logger.info(f"✅ File uploaded successfully: {response_data.get('name')}")
+                return response_data.get('name')
+            else:
+                logger.error(f"❌ Upload failed: {response.status_code} - {response.text}")
+                return None
         except Exception as e:
             logger.error(f"❌ Exception during upload: {str(e)}")
             return None
@@ -109,8 +324,10 @@ class ComfyUIClient:
     def load_workflow(self, workflow_path: str) -> Dict[str, Any]:
         """Load a workflow from a JSON file"""
         try:
-            with open(workflow_path, 'r', encoding='utf-8') as f:
-                workflow = json.load(f)
+            with open(workflow_path, 'rb') as f:
+                # Parse straight from the mapped file pages instead of reading through a buffer
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped, memoryview(mapped) as view:
+                    workflow = orjson.loads(view)
             return workflow
         except Exception as e:
             logger.error(f"❌ Error loading workflow from {workflow_path}: {str(e)}")
@@ -135,29 +352,14 @@ class ComfyUIClient:
         if "nodes" not in workflow:
             errors.append('Workflow is missing "nodes" property')
         
-        # If nodes exist in dictionary format, check for required node types
+        # If nodes exist in dictionary or list format, check for required node types
         if "nodes" in workflow:
-            if isinstance(workflow["nodes"], dict):
-                # Check for WanVideoTextEncode node (for text encoding)
-                has_text_encode = False
-                for node_id, node in workflow["nodes"].items():
-                    if node.get("class_type") == "WanVideoTextEncode":
-                        has_text_encode = True
-                        break
-                
-                if not has_text_encode:
-                    errors.append('Missing WanVideoTextEncode node')
-            
-            # If nodes are in list format
-            elif isinstance(workflow["nodes"], list):
-                # Check for WanVideoTextEncode node (for text encoding)
-                has_text_encode = False
-                for node in workflow["nodes"]:
-                    if node.get("type") == "WanVideoTextEncode":
-                        has_text_encode = True
-                        break
-                
-                if not has_text_encode:
+            if isinstance(workflow["nodes"], (dict, list)):
+                # Check for WanVideoTextEncode node (for text encoding), stopping at the first match;
+                # API format nodes use class_type and visual format nodes use type
+                nodes = workflow["nodes"]
+                key, node_list = ("class_type", nodes.values()) if isinstance(nodes, dict) else ("type", nodes)
+                if not any(node.get(key) == "WanVideoTextEncode" for node in node_list):
                     errors.append('Missing WanVideoTextEncode node')
             else:
                 errors.append(f'Workflow "nodes" is not a list or dictionary: {type(workflow["nodes"])}')
@@ -418,66 +620,55 @@ class ComfyUIClient:
             class_type = node.get("class_type")
             inputs = node.get("inputs", {})
             
-            # Check WanVideoTorchCompileSettings
-            if class_type == "WanVideoTorchCompileSettings":
-                required_fields = ["compile_transformer_blocks_only", "dynamic", "dynamo_cache_size_limit"]
-                for field in required_fields:
-                    if field not in inputs:
-                        errors.append(f"Node {node_id} ({class_type}) missing required input: {field}")
+            # Check required inputs for this node class
+            for field in _REQUIRED_NODE_INPUTS.get(class_type, ()):
+                if field not in inputs:
+                    errors.append(f"Node {node_id} ({class_type}) missing required input: {field}")
             
             # Check WanVideoTeaCache
-            elif class_type == "WanVideoTeaCache":
+            if class_type == "WanVideoTeaCache":
                 if "rel_l1_thresh" in inputs and inputs["rel_l1_thresh"] < 0:
                     errors.append(f"Node {node_id} ({class_type}) has invalid value for rel_l1_thresh: {inputs['rel_l1_thresh']} (must be >= 0)")
-                
-            # Check WanVideoEnhanceAVideo
-            elif class_type == "WanVideoEnhanceAVideo":
-                required_fields = ["start_percent", "weight", "end_percent"]
-                for field in required_fields:
-                    if field not in inputs:
-                        errors.append(f"Node {node_id} ({class_type}) missing required input: {field}")
-            
-            # Check WanVideoDecode
-            elif class_type == "WanVideoDecode":
-                if "enable_vae_tiling" not in inputs:
-                    errors.append(f"Node {node_id} ({class_type}) missing required input: enable_vae_tiling")
         
         return errors
 
+    def _build_payload(self, workflow: Dict[str, Any]) -> Dict[str, Any]:
+        """Transform and validate a workflow, then wrap it in a /prompt payload"""
+        # Transform workflow to API format
+        api_prompt = self._transform_workflow_to_api_format(workflow)
+        
+        # Validate workflow nodes before sending
+        validation_errors = self._validate_workflow_nodes({"nodes": api_prompt})
+        if validation_errors:
+            logger.error(f"❌ Workflow validation failed with the following errors:")
+            for error in validation_errors:
+                logger.error(f"  - {error}")
+            logger.error("Please fix these errors before submitting the workflow.")
+        
+        # Create the final payload
+        payload = {
+            "prompt": api_prompt,
+            "client_id": self.client_id
+        }
+        
+        # If the original workflow had extra_data, include it
+        if "extra_data" in workflow:
+            payload["extra_data"] = workflow["extra_data"]
+        
+        # For debugging - Save the payload to a file
+        debug_dir = os.path.join(os.getcwd(), "debug")
+        os.makedirs(debug_dir, exist_ok=True)
+        debug_file = os.path.join(debug_dir, f"workflow_payload_{int(time.time())}.json")
+        with open(debug_file, 'w') as f:
+            json.dump(payload, f, indent=2)
+        logger.debug(f"Wrote payload to {debug_file}")
+        
+        return payload
+    
     def queue_workflow(self, workflow: Dict[str, Any]) -> Optional[str]:
         """Queue a workflow for execution"""
         try:
-            # Transform workflow to API format
-            api_prompt = self._transform_workflow_to_api_format(workflow)
-            
-            # Validate workflow nodes before sending
-            validation_errors = self._validate_workflow_nodes({"nodes": api_prompt})
-            if validation_errors:
-                logger.error(f"❌ Workflow validation failed with the following errors:")
-                for error in validation_errors:
-                    logger.error(f"  - {error}")
-                logger.error("Please fix these errors before submitting the workflow.")
-            
-            # Create the final payload
-            payload = {
-                "prompt": api_prompt,
-                "client_id": self.client_id
-            }
-            
-            # If the original workflow had extra_data, include it
-            if "extra_data" in workflow:
-                payload["extra_data"] = workflow["extra_data"]
-            
-            # For debugging - Save the payload to a file
-            debug_dir = os.path.join(os.getcwd(), "debug")
-            os.makedirs(debug_dir, exist_ok=True)
-            debug_file = os.path.join(debug_dir, f"workflow_payload_{int(time.time())}.json")
-            with open(debug_file, 'w') as f:
-                json.dump(payload, f, indent=2)
-            logger.debug(f"Wrote payload to {debug_file}")
-            
-            # Add a small delay before API call to prevent rate limiting
-            time.sleep(1)
+            payload = self._build_payload(workflow)
             
             # Retry mechanism for API call
             max_retries = 3
@@ -489,14 +680,20 @@ class ComfyUIClient:
                     
                     response = self.session.post(
                         f"{self.server_url}/prompt",
-                        json=payload,
+                        data=orjson.dumps(payload),
+                        headers={"Content-Type": "application/json"},
                         timeout=30  # Set a timeout
                     )
                     
                     if response.status_code == 200:
-                        result = response.json()
+                        result = self._json(response)
                         prompt_id = result.get("prompt_id")
                         logger.info(f"✅ Workflow queued with ID: {prompt_id}")
+                        if prompt_id:
+                            # Let the WebSocket reader keep this prompt's events until it is waited on
+                            with self._events_lock:
+                                self._prompt_events.setdefault(prompt_id, [])
+                                self._prompt_signals.setdefault(prompt_id, threading.Event())
                         return prompt_id
                     else:
                         logger.error(f"❌ Failed to queue workflow: {response.status_code} - {response.text}")
@@ -537,6 +734,9 @@ class ComfyUIClient:
         # If nodes is a list (visual workflow format), convert to API format
         api_prompt = {}
         
+        # Index links by ID so each connected input is a single lookup
+        links_by_id = {link[0]: link for link in workflow.get("links") or []}
+        
         # Process each node
         for node in workflow["nodes"]:
             # Skip Note nodes as they're not supported by the API
@@ -554,139 +754,39 @@ class ComfyUIClient:
                 node_config["_meta"] = {"title": node["title"]}
             
             # Process inputs from both connections and widget values
-            self._process_node_inputs(node, node_config, workflow)
+            self._process_node_inputs(node, node_config, links_by_id)
             
             # Add to API prompt
             api_prompt[str(node["id"])] = node_config
         
         return api_prompt
     
-    def _process_node_inputs(self, node: Dict[str, Any], node_config: Dict[str, Any], workflow: Dict[str, Any]):
+    def _process_node_inputs(self, node: Dict[str, Any], node_config: Dict[str, Any], links_by_id: Dict[int, List[Any]]):
         """Process node inputs from both connections and widget values"""
         # Process widget values
         if "widgets_values" in node:
             widget_values = node["widgets_values"]
             
-            # Handle different node types
-            if node["type"] == "WanVideoTextEncode":
-                # Set positive and negative prompts
-                if len(widget_values) >= 2:
-                    node_config["inputs"].update({
-                        "positive_prompt": widget_values[0],
-                        "negative_prompt": widget_values[1],
-                        "force_zeros": widget_values[2] if len(widget_values) > 2 else True
-                    })
-            
-            elif node["type"] == "WanVideoBlockSwap":
-                # Set block swap parameters
-                if len(widget_values) >= 5:
-                    node_config["inputs"].update({
-                        "blocks_to_swap": widget_values[0],
-                        "offload_txt_emb": widget_values[1],
-                        "offload_img_emb": widget_values[2],
-                        "non_blocking": widget_values[3],
-                        "vace_blocks_to_swap": widget_values[4]
-                    })
-            
-            elif node["type"] == "WanVideoEmptyEmbeds":
-                # Set empty embeds parameters
-                if len(widget_values) >= 3:
-                    node_config["inputs"].update({
-                        "width": widget_values[0], 
-                        "height": widget_values[1],
-                        "num_frames": widget_values[2]
-                    })
-            
-            elif node["type"] == "WanVideoTorchCompileSettings":
-                # Handle torch compile settings
-                if len(widget_values) >= 7:
-                    node_config["inputs"].update({
-                        "backend": widget_values[0],
-                        "fullgraph": widget_values[1],
-                        "mode": widget_values[2],
-                        "max_autotune": widget_values[3],
-                        "max_autotune_gemm_backends": widget_values[4],
-                        "use_fp16_cast": widget_values[5],
-                        "max_autotune_gemm_warmup": widget_values[6],
-                        "compile_transformer_blocks_only": False,  # Default value
-                        "dynamic": False,  # Default value
-                        "dynamo_cache_size_limit": 64  # Default value
-                    })
+            inputs = node_config["inputs"]
+            schema = _WIDGET_SCHEMA.get(node["type"])
             
-            elif node["type"] == "WanVideoTeaCache":
-                # Handle tea cache settings
-                if len(widget_values) >= 6:
-                    node_config["inputs"].update({
-                        "start_step": widget_values[0],
-                        "end_step": widget_values[1],
-                        "rel_l1_thresh": max(0.0, float(widget_values[2])),  # Ensure minimum of 0.0
-                        "cache_device": widget_values[3],
-                        "use_coefficients": widget_values[4] == "true" if isinstance(widget_values[4], str) else widget_values[4],
-                        "coeff_mode": widget_values[5]
-                    })
-            
-            elif node["type"] == "WanVideoEnhanceAVideo":
-                # Handle enhance-a-video settings
-                if len(widget_values) >= 3:
-                    node_config["inputs"].update({
-                        "enhance_factor": widget_values[0],
-                        "enhance_start": widget_values[1],
-                        "enhance_end": widget_values[2],
-                        "start_percent": 0,  # Default values for required fields
-                        "end_percent": 1,
-                        "weight": 1
-                    })
-            
-            elif node["type"] == "WanVideoSampler":
-                # Set sampler parameters
-                if len(widget_values) >= 10:
-                    node_config["inputs"].update({
-                        "steps": widget_values[0],
-                        "cfg": widget_values[1],
-                        "shift": widget_values[2],
-                        "seed": widget_values[3],
-                        "sampler_name": widget_values[4],
-                        "diffusion_type": widget_values[5],
-                        "scheduler": widget_values[6],
-                        "riflex_freq_index": widget_values[7],
-                        "implementation": widget_values[10] if len(widget_values) > 10 else "comfy"
-                    })
-            
-            elif node["type"] == "WanVideoDecode":
-                # Set decoder parameters
-                if len(widget_values) >= 5:
-                    node_config["inputs"].update({
-                        "restore_faces": widget_values[0],
-                        "tile_x": widget_values[1],
-                        "tile_y": widget_values[2],
-                        "tile_stride_x": widget_values[3],
-                        "tile_stride_y": widget_values[4],
-                        "enable_vae_tiling": True  # Add the required parameter
-                    })
-            
-            elif node["type"] == "WanVideoVAELoader":
-                # Set VAE Loader parameters
-                if len(widget_values) >= 2:
-                    node_config["inputs"].update({
-                        "model_name": widget_values[0],
-                        "precision": widget_values[1]
-                    })
-            
-            elif node["type"] == "WanVideoModelLoader":
-                # Handle model loader settings
-                if len(widget_values) >= 5:
+            # Map widget positions to named inputs in one pass
+            if schema and len(widget_values) >= schema[1]:
+                field_names, _, defaults = schema
+                inputs.update(defaults)
+                inputs.update(zip(field_names, widget_values))
+                inputs.pop(None, None)  # Drop skipped widget positions
+                
+                if node["type"] == "WanVideoTeaCache":
+                    # Ensure minimum of 0.0 and accept string booleans
+                    inputs["rel_l1_thresh"] = max(0.0, float(inputs["rel_l1_thresh"]))
+                    if isinstance(inputs["use_coefficients"], str):
+                        inputs["use_coefficients"] = inputs["use_coefficients"] == "true"
+                
+                elif node["type"] == "WanVideoModelLoader":
                     # Ensure quantization doesn't use fp8_e4m3fn which causes errors
-                    quantization = widget_values[2] if len(widget_values) > 2 else "disabled"
-                    if "fp8" in quantization.lower():
-                        quantization = "disabled"  # Replace fp8 with disabled to avoid errors
-                    
-                    node_config["inputs"].update({
-                        "model": widget_values[0],
-                        "base_precision": widget_values[1],
-                        "quantization": quantization,
-                        "load_device": widget_values[3],
-                        "attention_implementation": widget_values[4]
-                    })
+                    if "fp8" in inputs["quantization"].lower():
+                        inputs["quantization"] = "disabled"  # Replace fp8 with disabled to avoid errors
             
             elif node["type"] == "VHS_VideoCombine":
                 # Handle complex widgets_values for VHS_VideoCombine
@@ -708,19 +808,18 @@ class ComfyUIClient:
                     })
         
         # Process connections/links
-        if "inputs" in node and workflow.get("links"):
+        if "inputs" in node and links_by_id:
             for input_data in node["inputs"]:
                 input_name = input_data["name"]
                 link_id = input_data.get("link")
                 
                 if link_id is not None:
                     # Find the corresponding link
-                    for link in workflow["links"]:
-                        if link[0] == link_id:  # link[0] is the link ID
-                            source_node_id = str(link[1])  # link[1] is the source node ID
-                            output_index = link[2]  # link[2] is the output index
-                            node_config["inputs"][input_name] = [source_node_id, output_index]
-                            break
+                    link = links_by_id.get(link_id)
+                    if link is not None:
+                        source_node_id = str(link[1])  # link[1] is the source node ID
+                        output_index = link[2]  # link[2] is the output index
+                        node_config["inputs"][input_name] = [source_node_id, output_index]
     
     def get_history(self, prompt_id: str) -> Optional[Dict[str, Any]]:
         """Get the history of a prompt execution"""
@@ -729,7 +828,7 @@ class ComfyUIClient:
             response = self.session.get(url)
             
             if response.status_code == 200:
-                return response.json()
+                return self._json(response)
             else:
                 logger.error(f"❌ Failed to get history: {response.status_code} - {response.text}")
                 return None
@@ -742,118 +841,51 @@ class ComfyUIClient:
         """
         Check the status of a workflow execution
         
+        Unchanged history responses (same ETag or body) reuse the previous
+        result instead of being parsed and evaluated again, and prompts that
+        have already completed or failed are answered without a request.
+        
         Returns:
             Tuple[bool, Dict, str]: 
                 - is_complete: Whether the workflow execution is complete
                 - history_data: The full history data if available
                 - error_message: Error message if there was an error
         """
+        # Completion and failure are final, so there's nothing new to fetch
+        terminal = self._terminal.get(prompt_id)
+        if terminal is not None:
+            self._terminal.move_to_end(prompt_id)
+            return terminal
+        
         try:
             url = f"{self.server_url}/history/{prompt_id}"
-            response = self.session.get(url)
+            cached = self._history_cache.get(prompt_id)
+            headers = {"If-None-Match": cached["etag"]} if cached and cached["etag"] else None
+            response = self.session.get(url, headers=headers)
+            
+            if response.status_code == 304 and cached:
+                return cached["result"]
             
             if response.status_code == 200:
-                history_data = response.json()
+                # Skip parsing when the history hasn't changed since the last check
+                digest = hash(response.content)
+                if cached and cached["digest"] == digest:
+                    return cached["result"]
                 
-                # Check if the prompt_id key exists in the history data
-                if prompt_id in history_data:
-                    # Get the prompt-specific data
-                    prompt_data = history_data[prompt_id]
-                    
-                    # Check if there's a status field with completed=true
-                    if "status" in prompt_data and prompt_data["status"].get("completed") == True:
-                        logger.info("✅ Workflow marked as completed in status field")
-                        return True, history_data, None
-                    
-                    # Check for errors in the status field
-                    if "status" in prompt_data and prompt_data["status"].get("status_str") == "error":
-                        error_msg = prompt_data["status"].get("error", "Unknown error")
-                        logger.error(f"❌ Workflow error in status field: {error_msg}")
-                        return False, history_data, f"Error: {error_msg}"
-                    
-                    # Check for node 30 in outputs within the prompt_data
-                    if "outputs" in prompt_data and "30" in prompt_data["outputs"]:
-                        logger.info("✅ Found node 30 in prompt_data outputs")
-                        return True, history_data, None
-                
-                # Check if there's an error in the history
-                if "error" in history_data:
-                    error_msg = history_data.get("error", "Unknown error")
-                    logger.error(f"❌ Workflow error: {error_msg}")
-                    return True, history_data, error_msg
-                
-                # Check for node 30 in outputs directly in history_data
-                if "outputs" in history_data and "30" in history_data["outputs"]:
-                    logger.info("✅ Found node 30 in history_data outputs")
-                    return True, history_data, None
-                
-                # Check if all nodes have executed
-                nodes_in_prompt = set()
-                executed_nodes = set()
-                executing_nodes = set()
-                
-                # First collect all nodes in the prompt
-                if prompt_id in history_data and "prompt" in history_data[prompt_id]:
-                    # Look in prompt_data
-                    for node_id in history_data[prompt_id]["prompt"]:
-                        # Only add non-special nodes (that don't start with $)
-                        if not node_id.startswith('$'):
-                            nodes_in_prompt.add(node_id)
-                elif "prompt" in history_data:
-                    # Look directly in history_data
-                    for node_id in history_data["prompt"]:
-                        # Only add non-special nodes (that don't start with $)
-                        if not node_id.startswith('$'):
-                            nodes_in_prompt.add(node_id)
-                
-                # Then collect all executed nodes from prompt_data or directly
-                if prompt_id in history_data and "outputs" in history_data[prompt_id]:
-                    # Get outputs from prompt_data
-                    for node_id in history_data[prompt_id]["outputs"]:
-                        if not node_id.startswith('$'):
-                            executed_nodes.add(node_id)
-                elif "outputs" in history_data:
-                    # Get outputs directly from history_data
-                    for node_id in history_data["outputs"]:
-                        if not node_id.startswith('$'):
-                            executed_nodes.add(node_id)
-                
-                # Also check for nodes currently executing
-                if prompt_id in history_data and "executing" in history_data[prompt_id]:
-                    # Get executing nodes from prompt_data
-                    for node_id in history_data[prompt_id]["executing"]:
-                        if not node_id.startswith('$'):
-                            executing_nodes.add(node_id)
-                elif "executing" in history_data:
-                    # Get executing nodes directly from history_data
-                    for node_id in history_data["executing"]:
-                        if not node_id.startswith('$'):
-                            executing_nodes.add(node_id)
-                
-                # Check for output node 30 (VHS_VideoCombine in our workflow)
-                is_complete = "30" in executed_nodes
-                
-                # Log status details for debugging
-                if executing_nodes:
-                    for node_id in executing_nodes:
-                        # Calculate progress for this node if available
-                        node_progress = None
-                        if prompt_id in history_data and "progress" in history_data[prompt_id]:
-                            node_progress = history_data[prompt_id]["progress"].get(node_id)
-                        elif "progress" in history_data:
-                            node_progress = history_data["progress"].get(node_id)
-                        
-                        if node_progress:
-                            logger.debug(f"🔄 Executing node {node_id}: {node_progress:.1f}% complete")
-                        else:
-                            logger.debug(f"🔄 Executing node {node_id}")
-                
-                if is_complete:
-                    logger.info("✅ Workflow execution complete")
-                elif executed_nodes:
-                    logger.debug(f"🔄 Progress: {len(executed_nodes)}/{len(nodes_in_prompt)} nodes completed")
+                known_executed_nodes = cached["executed_nodes"] if cached else set()
+                result = self._evaluate_history(prompt_id, self._json(response), known_executed_nodes)
+                is_complete, _, error_msg = result
+                if is_complete or (error_msg and "Error:" in error_msg):
+                    self._remember_terminal(prompt_id, result)
+                    return result
                 
-                return is_complete, history_data, None
+                self._history_cache[prompt_id] = {
+                    "etag": response.headers.get("ETag"),
+                    "digest": digest,
+                    "result": result,
+                    "executed_nodes": known_executed_nodes
+                }
+                return result
             
             else:
                 logger.error(f"❌ Failed to get history: {response.status_code} - {response.text}")
@@ -863,30 +895,128 @@ class ComfyUIClient:
             logger.error(f"❌ Error checking workflow status: {str(e)}")
             return False, None, str(e)
     
-    def get_video_url(self, filename: str, subfolder: str = "", format_type: str = "video/h264-mp4", frame_rate: float = 24.0) -> str:
-        """Get the direct URL to a video file"""
-        base_url = f"{self.server_url}/api/viewvideo"
-        params = {
-            "filename": filename,
-            "type": "output"
-        }
+    def _remember_terminal(self, prompt_id: str, result: Tuple[bool, Optional[Dict], Optional[str]]):
+        """Record a prompt's final status, evicting the least recently used entries past the limit"""
+        self._history_cache.pop(prompt_id, None)
+        self._terminal[prompt_id] = result
+        self._terminal.move_to_end(prompt_id)
+        while len(self._terminal) > TERMINAL_CACHE_SIZE:
+            self._terminal.popitem(last=False)
+    
+    def _evaluate_history(self, prompt_id: str, history_data: Dict[str, Any],
+                          known_executed_nodes: set) -> Tuple[bool, Optional[Dict], Optional[str]]:
+        """Work out the workflow status from parsed history, recording finished nodes in known_executed_nodes"""
+        # Check if the prompt_id key exists in the history data
+        if prompt_id in history_data:
+            # Get the prompt-specific data
+            prompt_data = history_data[prompt_id]
+            
+            # Check if there's a status field with completed=true
+            if "status" in prompt_data and prompt_data["status"].get("completed") == True:
+                logger.info("✅ Workflow marked as completed in status field")
+                return True, history_data, None
+            
+            # Check for errors in the status field
+            if "status" in prompt_data and prompt_data["status"].get("status_str") == "error":
+                error_msg = prompt_data["status"].get("error", "Unknown error")
+                logger.error(f"❌ Workflow error in status field: {error_msg}")
+                return False, history_data, f"Error: {error_msg}"
+            
+            # Check for node 30 in outputs within the prompt_data
+            if "outputs" in prompt_data and "30" in prompt_data["outputs"]:
+                logger.info("✅ Found node 30 in prompt_data outputs")
+                return True, history_data, None
+        
+        # Check if there's an error in the history
+        if "error" in history_data:
+            error_msg = history_data.get("error", "Unknown error")
+            logger.error(f"❌ Workflow error: {error_msg}")
+            return True, history_data, error_msg
+        
+        # A pushed "executing" message with no node means the prompt has finished running
+        executing = history_data.get(prompt_id, history_data).get("executing")
+        if isinstance(executing, dict) and "node" in executing and executing["node"] is None:
+            logger.info("✅ Workflow execution finished (executing node is null)")
+            return True, history_data, None
+        
+        # Check for node 30 in outputs directly in history_data
+        if "outputs" in history_data and "30" in history_data["outputs"]:
+            logger.info("✅ Found node 30 in history_data outputs")
+            return True, history_data, None
+        
+        # Look up each field in the prompt's own entry first, then directly in history_data
+        view = ChainMap(history_data[prompt_id], history_data) if prompt_id in history_data else history_data
+        
+        # Collect the nodes in the prompt, the executed nodes and the ones still executing,
+        # leaving out special nodes (that start with $)
+        nodes_in_prompt = {node_id for node_id in view.get("prompt", ()) if not node_id.startswith('$')}
+        executed_nodes = {node_id for node_id in view.get("outputs", ()) if not node_id.startswith('$')}
+        executing_nodes = {node_id for node_id in view.get("executing", ()) if not node_id.startswith('$')}
+        
+        # Check for output node 30 (VHS_VideoCombine in our workflow)
+        is_complete = "30" in executed_nodes
+        
+        # Log status details for debugging
+        if executing_nodes:
+            for node_id in executing_nodes:
+                # Calculate progress for this node if available
+                node_progress = view["progress"].get(node_id) if "progress" in view else None
+                
+                if node_progress:
+                    logger.debug(f"🔄 Executing node {node_id}: {node_progress:.1f}% complete")
+                else:
+                    logger.debug(f"🔄 Executing node {node_id}")
+        
+        if is_complete:
+            logger.info("✅ Workflow execution complete")
+        elif executed_nodes - known_executed_nodes:
+            # Only report progress when new nodes have finished since the last check
+            logger.debug(f"🔄 Progress: {len(executed_nodes)}/{len(nodes_in_prompt)} nodes completed")
+        
+        known_executed_nodes.update(executed_nodes)
+        return is_complete, history_data, None
+    
+    def _build_url(self, base: str, filename: str, subfolder: str = "", 
+                   format_type: str = "", frame_rate: float = 0) -> str:
+        """Build a view URL for an output file, skipping empty parameters"""
+        parts = [f"filename={quote_plus(filename)}", "type=output"]
         if subfolder:
-            params["subfolder"] = subfolder
+            parts.append(f"subfolder={quote_plus(subfolder)}")
         if format_type:
-            params["format"] = format_type
+            parts.append(f"format={quote_plus(format_type)}")
         if frame_rate:
-            params["frame_rate"] = frame_rate
-        
-        # Create URL with query parameters
-        return f"{base_url}?{urlencode(params)}"
+            parts.append(f"frame_rate={frame_rate}")
+        return f"{base}?{'&'.join(parts)}"
+    
+    def get_video_url(self, filename: str, subfolder: str = "", format_type: str = "video/h264-mp4", frame_rate: float = 24.0) -> str:
+        """Get the direct URL to a video file"""
+        return self._build_url(self._viewvideo_url, filename, subfolder, format_type, frame_rate)
+    
+    def _iter_outputs(self, history_data: Dict[str, Any], prompt_id: str) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        """Yield (node_id, output_type, item) for every file item in the history outputs"""
+        # Outputs are nested under the prompt ID in the new format, or directly in the history data
+        prompt_data = history_data.get(prompt_id, history_data)
+        for node_id, node_outputs in prompt_data.get("outputs", {}).items():
+            if not isinstance(node_outputs, dict):
+                continue
+            for output_type, output_data in node_outputs.items():
+                if isinstance(output_data, list):
+                    for item in output_data:
+                        if isinstance(item, dict) and "filename" in item:
+                            yield node_id, output_type, item
     
     def get_output_files(self, prompt_id: str) -> List[Dict[str, Any]]:
         """Get the output files from a completed workflow"""
         try:
             logger.info("🔍 Getting list of output files...")
             
-            # Get the history data directly
+            # Get the history data directly, giving it a moment to appear if execution only just finished
             history_data = self.get_history(prompt_id)
+            for _ in range(OUTPUT_HISTORY_RETRIES):
+                if history_data:
+                    break
+                time.sleep(OUTPUT_HISTORY_RETRY_DELAY)
+                history_data = self.get_history(prompt_id)
             
             if not history_data:
                 logger.error("❌ Cannot get output files: No history data")
@@ -895,96 +1025,35 @@ class ComfyUIClient:
             # Extract files from the outputs
             output_files = []
             
-            # Check if the history data has the prompt_id as a key (new format)
-            if prompt_id in history_data:
-                # Get the prompt-specific data
-                prompt_data = history_data[prompt_id]
+            for node_id, output_type, item in self._iter_outputs(history_data, prompt_id):
+                # Determine file type
+                file_type = "video" if item.get("format", "")[:6] == "video/" else "image"
+                subfolder = item.get("subfolder", "")
                 
-                if "outputs" in prompt_data:
-                    for node_id, node_outputs in prompt_data["outputs"].items():
-                        # Handle different output formats
-                        if isinstance(node_outputs, dict):
-                            for output_type, output_data in node_outputs.items():
-                                if isinstance(output_data, list):
-                                    for item in output_data:
-                                        if isinstance(item, dict) and "filename" in item:
-                                            # Determine file type
-                                            file_type = "video" if item.get("format", "").startswith("video/") else "image"
-                                            
-                                            file_info = {
-                                                "filename": item["filename"],
-                                                "subfolder": item.get("subfolder", ""),
-                                                "type": item.get("type", "output"),
-                                                "node_id": node_id,
-                                                "file_type": file_type
-                                            }
-                                            
-                                            # Add video specific info if available
-                                            if file_type == "video":
-                                                file_info["format"] = item.get("format", "video/h264-mp4")
-                                                file_info["frame_rate"] = item.get("frame_rate", 24.0)
-                                                # Generate the video URL
-                                                file_info["url"] = self.get_video_url(
-                                                    item["filename"], 
-                                                    item.get("subfolder", ""),
-                                                    item.get("format", "video/h264-mp4"),
-                                                    item.get("frame_rate", 24.0)
-                                                )
-                                            else:
-                                                # Generate image URL
-                                                base_url = f"{self.server_url}/api/view"
-                                                url_params = {
-                                                    "filename": item["filename"],
-                                                    "type": "output"
-                                                }
-                                                if item.get("subfolder"):
-                                                    url_params["subfolder"] = item["subfolder"]
-                                                file_info["url"] = f"{base_url}?{urlencode(url_params)}"
-                                            
-                                            output_files.append(file_info)
-            else:
-                # Original format where outputs is directly in the history data
-                if "outputs" in history_data:
-                    for node_id, node_outputs in history_data["outputs"].items():
-                        # Look for different types of outputs
-                        for output_type, output_data in node_outputs.items():
-                            if isinstance(output_data, list):
-                                for item in output_data:
-                                    if isinstance(item, dict) and "filename" in item:
-                                        # Determine file type
-                                        file_type = "video" if item.get("format", "").startswith("video/") else "image"
-                                        
-                                        file_info = {
-                                            "filename": item["filename"],
-                                            "subfolder": item.get("subfolder", ""),
-                                            "type": item.get("type", "output"),
-                                            "node_id": node_id,
-                                            "file_type": file_type
-                                        }
-                                        
-                                        # Add video specific info if available
-                                        if file_type == "video":
-                                            file_info["format"] = item.get("format", "video/h264-mp4")
-                                            file_info["frame_rate"] = item.get("frame_rate", 24.0)
-                                            # Generate the video URL
-                                            file_info["url"] = self.get_video_url(
-                                                item["filename"], 
-                                                item.get("subfolder", ""),
-                                                item.get("format", "video/h264-mp4"),
-                                                item.get("frame_rate", 24.0)
-                                            )
-                                        else:
-                                            # Generate image URL
-                                            base_url = f"{self.server_url}/api/view"
-                                            url_params = {
-                                                "filename": item["filename"],
-                                                "type": "output"
-                                            }
-                                            if item.get("subfolder"):
-                                                url_params["subfolder"] = item["subfolder"]
-                                            file_info["url"] = f"{base_url}?{urlencode(url_params)}"
-                                        
-                                        output_files.append(file_info)
+                file_info = {
+                    "filename": item["filename"],
+                    "subfolder": subfolder,
+                    "type": item.get("type", "output"),
+                    "node_id": node_id,
+                    "file_type": file_type
+                }
+                
+                # Add video specific info if available
+                if file_type == "video":
+                    file_info["format"] = item.get("format", "video/h264-mp4")
+                    file_info["frame_rate"] = item.get("frame_rate", 24.0)
+                    # Generate the video URL
+                    file_info["url"] = self.get_video_url(
+                        item["filename"], 
+                        subfolder,
+                        file_info["format"],
+                        file_info["frame_rate"]
+                    )
+                else:
+                    # Generate image URL
+                    file_info["url"] = self._build_url(self._view_url, item["filename"], subfolder)
+                
+                output_files.append(file_info)
             
             # Special handling for VHS_VideoCombine output (node 30)
             vhs_output_files = [f for f in output_files if f["node_id"] == "30"]
@@ -1007,7 +1076,7 @@ class ComfyUIClient:
             # First, make a HEAD request to establish authentication
             response = self.session.head(
                 video_url,
-                headers=self._get_video_headers()
+                headers=self._video_headers
             )
             
             if response.status_code < 300:
@@ -1021,12 +1090,29 @@ class ComfyUIClient:
             logger.error(f"❌ Error preparing video URL: {str(e)}")
             return video_url
     
+    def _save_response(self, response: requests.Response, output_path: str):
+        """Stream a response body to a temporary file, then move it into place"""
+        # Replacing rather than truncating leaves other links to an older file (e.g. a cached copy) intact
+        part_path = f"{output_path}.part"
+        response.raw.decode_content = True
+        try:
+            with open(part_path, 'wb') as f:
+                shutil.copyfileobj(response.raw, f, DOWNLOAD_BUFFER_SIZE)
+            os.replace(part_path, output_path)
+        except BaseException:
+            # Don't leave a partial download behind
+            try:
+                os.remove(part_path)
+            except OSError:
+                pass
+            raise
+    
     def download_file(self, filename: str, output_dir: str, subfolder: str = "", 
                      format_type: str = None, frame_rate: float = None) -> Optional[str]:
         """Download a file from the ComfyUI server"""
         try:
             # Determine the file type
-            is_video = filename.lower().endswith(('.mp4', '.avi', '.mov', '.webm'))
+            is_video = os.path.splitext(filename)[1].lower() in _VIDEO_EXTS
             
             # Set the download URL
             if is_video:
@@ -1039,14 +1125,7 @@ class ComfyUIClient:
                 )
             else:
                 # For other file types, use the view endpoint
-                base_url = f"{self.server_url}/api/view"
-                params = {
-                    "filename": filename,
-                    "type": "output"
-                }
-                if subfolder:
-                    params["subfolder"] = subfolder
-                download_url = f"{base_url}?{urlencode(params)}"
+                download_url = self._build_url(self._view_url, filename, subfolder)
                 
             logger.info(f"📥 Downloading file: {filename}{' (subfolder: ' + subfolder + ')' if subfolder else ''}")
             
@@ -1058,7 +1137,7 @@ class ComfyUIClient:
             # Step 2: Download the file
             response = self.session.get(
                 download_url,
-                headers=self._get_video_headers() if is_video else self._get_headers(),
+                headers=self._video_headers if is_video else self._api_headers,
                 stream=True
             )
             
@@ -1070,22 +1149,21 @@ class ComfyUIClient:
                 output_path = os.path.join(output_dir, filename)
                 
                 # Save the file
-                with open(output_path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
+                self._save_response(response, output_path)
                 
                 logger.info(f"✅ Downloaded file to: {output_path}")
                 return output_path
             else:
                 logger.error(f"❌ Download failed: {response.status_code} - {response.text}")
                 
-                # Try a different approach - direct download with API key in both headers and URL
+                # Try a different approach - direct download with the API key also sent as a bearer token
                 logger.info("🔄 Trying direct download with API key...")
-                direct_url = f"{download_url}&api_key={self.api_key}"
-                direct_response = requests.get(
-                    direct_url,
-                    headers=self._get_video_headers() if is_video else self._get_headers(),
+                direct_response = self.session.get(
+                    download_url,
+                    headers={
+                        **(self._video_headers if is_video else self._api_headers),
+                        "Authorization": f"Bearer {self.api_key}"
+                    },
                     stream=True
                 )
                 
@@ -1097,10 +1175,7 @@ class ComfyUIClient:
                     output_path = os.path.join(output_dir, filename)
                     
                     # Save the file
-                    with open(output_path, 'wb') as f:
-                        for chunk in direct_response.iter_content(chunk_size=8192):
-                            if chunk:
-                                f.write(chunk)
+                    self._save_response(direct_response, output_path)
                     
                     logger.info(f"✅ Downloaded file to: {output_path} (direct method)")
                     return output_path
@@ -1112,6 +1187,56 @@ class ComfyUIClient:
             logger.error(f"❌ Error downloading file: {str(e)}")
             return None
     
+    def iter_downloads(self, items: List[Dict[str, Any]], output_dir: str, 
+                       max_workers: int = 8) -> Iterator[Tuple[Dict[str, Any], Optional[str]]]:
+        """
+        Download several output files concurrently, yielding each as soon as it finishes
+        
+        Returns:
+            Iterator[Tuple[Dict, Optional[str]]]: (item, local path or None) pairs in completion order
+        """
+        if not items:
+            return
+        
+        pending = deque(items)
+        finished = queue.Queue()
+        stopped = threading.Event()
+        
+        def worker():
+            while not stopped.is_set():
+                try:
+                    item = pending.popleft()
+                except IndexError:
+                    return
+                try:
+                    output_path = self._download_item(item, output_dir)
+                except Exception as e:
+                    logger.error(f"❌ Error downloading {item.get('filename')}: {str(e)}")
+                    output_path = None
+                finished.put((item, output_path))
+        
+        # Daemon workers, unlike a ThreadPoolExecutor's, don't hold up interpreter exit
+        # while a download the caller no longer wants is still running
+        for _ in range(min(max_workers, len(items))):
+            threading.Thread(target=worker, daemon=True).start()
+        
+        try:
+            for _ in range(len(items)):
+                yield finished.get()
+        finally:
+            # If the caller stops early, drop the downloads that haven't started instead of waiting for them
+            stopped.set()
+    
+    def _download_item(self, item: Dict[str, Any], output_dir: str) -> Optional[str]:
+        """Download one output file described by a get_output_files item"""
+        return self.download_file(
+            item["filename"],
+            output_dir,
+            item.get("subfolder", ""),
+            item.get("format"),
+            item.get("frame_rate")
+        )
+    
     def get_queue_status(self, prompt_id: str) -> Dict[str, Any]:
         """
         Get the queue status of a workflow from the ComfyUI API
@@ -1120,7 +1245,8 @@ class ComfyUIClient:
             Dict with queue information including position and progress
         """
         try:
-            url = f"{self.server_url}/prompt"
+            # /queue lists the running and pending prompts; /prompt only reports the remaining count
+            url = f"{self.server_url}/queue"
             response = self.session.get(url)
             
             queue_info = {
@@ -1133,18 +1259,19 @@ class ComfyUIClient:
             }
             
             if response.status_code == 200:
-                queue_data = response.json()
+                queue_data = self._json(response)
                 
                 # Check if the prompt is in queue_running array
-                if "queue_running" in queue_data and queue_data["queue_running"]:
-                    for item in queue_data["queue_running"]:
-                        # queue_running items are arrays with prompt_id at index 1
-                        if isinstance(item, list) and len(item) > 1 and item[1] == prompt_id:
-                            queue_info["queue_position"] = 0
-                            queue_info["queue_running"] = True
-                            queue_info["is_in_queue"] = True
-                            logger.debug(f"Prompt {prompt_id} is currently running")
-                            break
+                # queue_running items are arrays with prompt_id at index 1
+                running_ids = {
+                    item[1] for item in queue_data.get("queue_running") or []
+                    if isinstance(item, list) and len(item) > 1
+                }
+                if prompt_id in running_ids:
+                    queue_info["queue_position"] = 0
+                    queue_info["queue_running"] = True
+                    queue_info["is_in_queue"] = True
+                    logger.debug(f"Prompt {prompt_id} is currently running")
                 
                 # Check if the prompt is in queue_pending array
                 if "queue_pending" in queue_data and not queue_info["is_in_queue"]:
@@ -1152,13 +1279,16 @@ class ComfyUIClient:
                     queue_info["queue_size"] += len(queue_pending)
                     
                     # Find our prompt's position in pending queue
-                    for idx, item in enumerate(queue_pending):
-                        if isinstance(item, list) and len(item) > 1 and item[1] == prompt_id:
-                            queue_info["queue_position"] = idx + 1  # +1 because position 0 is running
-                            queue_info["queue_remaining"] = idx + 1
-                            queue_info["is_in_queue"] = True
-                            logger.debug(f"Prompt {prompt_id} is pending at position {idx + 1}")
-                            break
+                    pending_index = {
+                        item[1]: idx for idx, item in enumerate(queue_pending)
+                        if isinstance(item, list) and len(item) > 1
+                    }
+                    idx = pending_index.get(prompt_id)
+                    if idx is not None:
+                        queue_info["queue_position"] = idx + 1  # +1 because position 0 is running
+                        queue_info["queue_remaining"] = idx + 1
+                        queue_info["is_in_queue"] = True
+                        logger.debug(f"Prompt {prompt_id} is pending at position {idx + 1}")
                 
                 # Get executing prompt progress if available
                 if queue_info["queue_running"] and "progress" in queue_data and queue_data["progress"] is not None:
@@ -1181,355 +1311,531 @@ class ComfyUIClient:
             return queue_info
 
     def wait_for_workflow_completion(self, prompt_id: str, timeout_minutes: int = 120, 
-                                     status_callback=None) -> bool:
+                                     status_callback=None, min_check_interval: float = POLL_INTERVAL_MIN,
+                                     max_check_interval: float = POLL_INTERVAL_MAX) -> bool:
         """
         Wait for workflow completion with timeout and optional status callback
         
+        Uses pushed WebSocket events when the socket is available, then a
+        Server-Sent Events stream, and falls back to polling /history if
+        neither is available or the connection drops.
+        
         Args:
             prompt_id: The ID of the prompt to wait for
             timeout_minutes: Maximum time to wait in minutes
             status_callback: Optional callback function to report status
+            min_check_interval: Polling interval in seconds while progress is changing
+            max_check_interval: Longest polling interval in seconds once progress stalls
             
         Returns:
             bool: True if workflow completed successfully, False otherwise
         """
-        # Calculate timeout
+        start_time = time.monotonic()
+        
+        try:
+            # Reconnect a socket that dropped since the last wait rather than dropping to polling
+            if self.ws is None and self._ws_supported:
+                logger.info("🔌 Reconnecting to ComfyUI WebSocket")
+                self._open_ws()
+            
+            # Events already queued for this prompt are still worth reading if the socket has since dropped
+            if self.ws is not None or self._prompt_events.get(prompt_id):
+                result = self._wait_via_websocket(prompt_id, start_time, timeout_minutes, status_callback)
+                if result is not None:
+                    return result
+                logger.warning("⚠️ WebSocket connection lost, trying event stream")
+            
+            if self._sse_supported is not False:
+                result = self.stream_progress(prompt_id, start_time, timeout_minutes, status_callback)
+                if result is not None:
+                    return result
+                logger.info("ℹ️ Event stream unavailable, falling back to polling")
+            
+            return self._poll_for_workflow_completion(prompt_id, start_time, timeout_minutes, status_callback,
+                                                      min_check_interval, max_check_interval)
+        finally:
+            # Make sure every status update has been delivered before returning to the caller
+            self._flush_status()
+    
+    def _emit_status(self, status_callback: Callable[[str], Any], status: str):
+        """Hand a status update to the callback thread, replacing any update that hasn't run yet"""
+        with self._status_lock:
+            already_scheduled = self._pending_status is not None
+            self._pending_status = (status_callback, status)
+        if not already_scheduled:
+            self._cb_executor.submit(self._deliver_status)
+    
+    def _deliver_status(self):
+        """Run the most recent pending status callback"""
+        with self._status_lock:
+            status_callback, status = self._pending_status
+            self._pending_status = None
+        try:
+            status_callback(status)
+        except Exception as e:
+            logger.warning(f"⚠️ Status callback failed: {str(e)}")
+    
+    def _flush_status(self):
+        """Wait until all scheduled status callbacks have run"""
+        self._cb_executor.submit(lambda: None).result()
+    
+    def _check_missed_completion(self, prompt_id: str, status_callback=None) -> Optional[bool]:
+        """
+        Check /history for a result the event stream may not have delivered
+        
+        Returns:
+            True if complete, False if the workflow failed, None if still running
+        """
+        is_complete, _, error_msg = self.check_workflow_status(prompt_id)
+        
+        if is_complete:
+            if status_callback:
+                self._emit_status(status_callback, "100% - Complete")
+            logger.info("✅ Workflow completed successfully")
+            return True
+        
+        if error_msg and "Error:" in error_msg:
+            logger.error(f"❌ Workflow failed: {error_msg}")
+            if status_callback:
+                self._emit_status(status_callback, f"Error: {error_msg}")
+            return False
+        
+        return None
+    
+    def _read_websocket_events(self, ws: websocket.WebSocket):
+        """Background reader: queue execution events per prompt and wake any waiter"""
+        while True:
+            try:
+                message = ws.recv()
+            except Exception as e:
+                logger.warning(f"⚠️ WebSocket error: {str(e)}")
+                break
+            
+            # Binary frames carry preview images, which we don't need
+            if not isinstance(message, str):
+                continue
+            
+            try:
+                event = orjson.loads(message)
+            except orjson.JSONDecodeError:
+                continue
+            
+            prompt_id = (event.get("data") or {}).get("prompt_id")
+            if not prompt_id:
+                continue
+            
+            # Keep events for every prompt we queued that hasn't been waited on yet, so later
+            # waits in a batch still see them; anything else belongs to another run or is finished
+            with self._events_lock:
+                if prompt_id not in self._prompt_signals:
+                    continue
+                self._prompt_events.setdefault(prompt_id, []).append(event)
+                self._prompt_signals[prompt_id].set()
+        
+        # Wake all waiters so they notice the socket is gone and fall back to polling
+        with self._events_lock:
+            if self.ws is ws:
+                self.ws = None
+            for signal in self._prompt_signals.values():
+                signal.set()
+    
+    def _take_prompt_events(self, prompt_id: str) -> List[Dict[str, Any]]:
+        """Remove and return the queued events for a prompt"""
+        with self._events_lock:
+            self._prompt_signals[prompt_id].clear()
+            return self._prompt_events.pop(prompt_id, [])
+    
+    def _dispatch_execution_event(self, event: Dict[str, Any], state: Dict[str, Any], 
+                                  status_callback=None) -> Optional[bool]:
+        """
+        Apply one execution event for our prompt and report status
+        
+        Returns:
+            True if the workflow completed, False if it failed, None otherwise
+        """
+        event_type = event.get("type")
+        data = event.get("data") or {}
+        status = None
+        
+        if event_type == "execution_start":
+            status = "0% - Processing"
+        
+        elif event_type == "execution_cached":
+            state["executed_nodes"].update(data.get("nodes") or [])
+        
+        elif event_type == "executing":
+            node_id = data.get("node")
+            
+            # A null node marks the end of execution for this prompt, which only
+            # means success if no error or interruption was reported first
+            if node_id is None:
+                if state["failed"]:
+                    return False
+                if status_callback:
+                    self._emit_status(status_callback, "100% - Complete")
+                logger.info("✅ Workflow completed successfully")
+                return True
+            
+            state["current_node"] = node_id
+            desc = _NODE_DESCRIPTIONS.get(node_id, f"Step {node_id}")
+            # Frame generation starts at the bottom of its range and advances with sampler steps
+            progress_pct = _GENERATING_PROGRESS_BASE if node_id == "27" else _STAGE_PERCENTAGES.get(node_id, 50)
+            status = f"{progress_pct}% - Processing: {desc}"
+            logger.debug(f"⏳ Processing node {node_id}: {desc}")
+        
+        elif event_type == "progress":
+            node_id = data.get("node") or state["current_node"]
+            value, max_value = data.get("value", 0), data.get("max") or 0
+            
+            # Frame generation reports sampler steps, which gives real progress within the stage
+            if node_id == "27" and max_value:
+                progress_pct = _GENERATING_PROGRESS_BASE + int(_GENERATING_PROGRESS_RANGE * value / max_value)
+                desc = _NODE_DESCRIPTIONS["27"]
+                status = f"{progress_pct}% - Processing: {desc} (step {value}/{max_value})"
+        
+        elif event_type == "executed":
+            node_id = data.get("node")
+            state["executed_nodes"].add(node_id)
+            logger.debug(f"✅ Completed node {node_id}: {_NODE_DESCRIPTIONS.get(node_id, f'Step {node_id}')}")
+        
+        elif event_type == "execution_success":
+            if status_callback:
+                self._emit_status(status_callback, "100% - Complete")
+            logger.info("✅ Workflow completed successfully")
+            return True
+        
+        elif event_type == "execution_error":
+            state["failed"] = True
+            error_msg = data.get("exception_message", "Unknown error")
+            logger.error(f"❌ Workflow failed: {error_msg}")
+            if status_callback:
+                self._emit_status(status_callback, f"Error: {error_msg}")
+            return False
+        
+        elif event_type == "execution_interrupted":
+            state["failed"] = True
+            logger.error(f"❌ Workflow was interrupted at node {data.get('node_id')}")
+            if status_callback:
+                self._emit_status(status_callback, "Error: Workflow interrupted")
+            return False
+        
+        if status and status_callback:
+            self._emit_status(status_callback, status)
+        
+        return None
+    
+    def _wait_via_websocket(self, prompt_id: str, start_time: float, timeout_minutes: int, 
+                            status_callback=None) -> Optional[bool]:
+        """
+        Wait for workflow completion on events pushed by the WebSocket reader
+        
+        Returns:
+            True if the workflow completed, False if it failed or timed out,
+            None if the socket dropped and the caller should fall back to polling
+        """
         timeout_seconds = timeout_minutes * 60
-        start_time = time.time()
-        check_interval = 5.0  # Start with 5 seconds between checks
-        last_update_time = 0
-        last_queue_check_time = 0
-        queue_check_interval = 5.0  # Check queue every 5 seconds
+        state = {"current_node": None, "executed_nodes": set(), "failed": False}
         
-        # Wait a moment before first check
-        time.sleep(1)
+        with self._events_lock:
+            signal = self._prompt_signals.setdefault(prompt_id, threading.Event())
         
-        # For tracking which nodes have completed
-        known_executed_nodes = set()
-        total_nodes = 12  # Our text-to-video workflow has approximately 12 nodes
-        
-        # Expected node sequence for reporting
-        node_descriptions = {
-            "11": "Loading T5 encoder model",
-            "16": "Encoding text prompt",
-            "37": "Preparing latent space",
-            "39": "Setting up block swap",
-            "22": "Loading video model",
-            "38": "Loading VAE model",
-            "52": "Configuring tea cache",
-            "55": "Setting up video enhancement",
-            "27": "Generating frames with sampler",
-            "28": "Decoding video frames",
-            "30": "Combining frames into video"
-        }
+        try:
+            # Events sent before the socket subscribed are lost, so check history once up front
+            result = self._check_missed_completion(prompt_id, status_callback)
+            if result is not None:
+                return result
+            
+            while True:
+                for event in self._take_prompt_events(prompt_id):
+                    result = self._dispatch_execution_event(event, state, status_callback)
+                    if result is not None:
+                        return result
+                
+                if self.ws is None:
+                    return None
+                
+                remaining = timeout_seconds - (time.monotonic() - start_time)
+                if remaining <= 0:
+                    logger.error(f"⏰ Workflow processing timed out after {timeout_minutes} minutes")
+                    return False
+                
+                # Sleep until the reader has something for us instead of on a fixed timer
+                if not signal.wait(min(WS_IDLE_CHECK_SECONDS, remaining)):
+                    # No events for a while - make sure we didn't miss the end of execution
+                    result = self._check_missed_completion(prompt_id, status_callback)
+                    if result is not None:
+                        return result
+        finally:
+            with self._events_lock:
+                self._prompt_signals.pop(prompt_id, None)
+                self._prompt_events.pop(prompt_id, None)
+            # The wait is over, so the cached history for this prompt won't be checked again
+            self._history_cache.pop(prompt_id, None)
+    
+    def stream_progress(self, prompt_id: str, start_time: float, timeout_minutes: int, 
+                        status_callback=None) -> Optional[bool]:
+        """
+        Wait for workflow completion on a Server-Sent Events stream
         
-        # Progress milestones to report for visual feedback
-        progress_milestones = {
-            "11": 5,    # T5 encoder loading
-            "16": 10,   # Text encoding  
-            "37": 15,   # Latent space preparation
-            "39": 20,   # Block swap setup
-            "22": 25,   # Model loading
-            "38": 30,   # VAE loading
-            "52": 35,   # TeaCache configuration
-            "55": 40,   # Video enhancement setup
-            "27": 50,   # Frame generation (main work)
-            "28": 85,   # Decoding frames  
-            "30": 95,   # Combining into video
-        }
+        For deployments that proxy plain HTTP but not WebSockets. The stream
+        carries the same execution event messages as the WebSocket.
         
-        # Percentage estimates for different stages
-        stage_percentages = {
-            "11": 5,    # T5 encoder loading
-            "16": 10,   # Text encoding  
-            "37": 15,   # Latent space preparation
-            "39": 20,   # Block swap setup
-            "22": 25,   # Model loading
-            "38": 30,   # VAE loading
-            "52": 35,   # TeaCache configuration
-            "55": 40,   # Video enhancement setup
-            "27": 50,   # Frame generation (main work)
-            "28": 85,   # Decoding frames  
-            "30": 95,   # Combining into video
-        }
+        Returns:
+            True if the workflow completed, False if it failed or timed out,
+            None if the server has no event stream and the caller should poll
+        """
+        timeout_seconds = timeout_minutes * 60
+        state = {"current_node": None, "executed_nodes": set(), "failed": False}
+        events_url = f"{self.server_url}/events?clientId={self.client_id}"
+        
+        # Events sent before the stream opened are lost, so check history once up front
+        result = self._check_missed_completion(prompt_id, status_callback)
+        if result is not None:
+            return result
+        
+        while True:
+            remaining = timeout_seconds - (time.monotonic() - start_time)
+            if remaining <= 0:
+                logger.error(f"⏰ Workflow processing timed out after {timeout_minutes} minutes")
+                return False
+            
+            stream_opened = False
+            try:
+                # The read timeout bounds how long the stream may stay quiet before we check history
+                with self.session.get(
+                    events_url,
+                    headers={"Accept": "text/event-stream"},
+                    stream=True,
+                    timeout=(10, min(WS_IDLE_CHECK_SECONDS, remaining))
+                ) as response:
+                    content_type = response.headers.get("Content-Type", "")
+                    if response.status_code != 200 or not content_type.startswith("text/event-stream"):
+                        logger.debug(f"No event stream: {response.status_code} {content_type}")
+                        self._sse_supported = False
+                        return None
+                    
+                    stream_opened = True
+                    self._sse_supported = True
+                    
+                    # Read raw bytes: event streams are always UTF-8, but requests would decode them as
+                    # latin-1 when the Content-Type has no charset. orjson decodes the bytes as UTF-8.
+                    for line in response.iter_lines():
+                        if not line or not line.startswith(b"data:"):
+                            continue
+                        
+                        try:
+                            event = orjson.loads(line[5:])
+                        except orjson.JSONDecodeError:
+                            continue
+                        
+                        # Only react to events for our prompt
+                        if (event.get("data") or {}).get("prompt_id") != prompt_id:
+                            continue
+                        
+                        result = self._dispatch_execution_event(event, state, status_callback)
+                        if result is not None:
+                            return result
+                        
+                        if time.monotonic() - start_time > timeout_seconds:
+                            break
+            
+            except requests.RequestException as e:
+                # Failing to open the stream means it isn't usable; a read timeout just means it went quiet
+                if not stream_opened:
+                    logger.warning(f"⚠️ Event stream error: {str(e)}")
+                    return None
+                logger.debug(f"Event stream interrupted: {str(e)}")
+            
+            # The stream ended or went quiet - make sure we didn't miss the end of execution
+            result = self._check_missed_completion(prompt_id, status_callback)
+            if result is not None:
+                return result
+    
+    def _estimate_node27_progress(self, elapsed_time: float) -> int:
+        """Estimate frame generation progress from the time spent waiting so far"""
+        generation_time = elapsed_time - _GENERATING_SETUP_SECONDS
+        if generation_time <= 0:
+            return _GENERATING_PROGRESS_BASE
+        return _GENERATING_PROGRESS_BASE + min(
+            _GENERATING_PROGRESS_RANGE,
+            int(generation_time * _GENERATING_PROGRESS_RANGE / _GENERATING_DURATION_SECONDS)
+        )
+    
+    def _compute_progress(self, current_node: Optional[str], elapsed_time: float,
+                          outputs: Dict[str, Any]) -> Tuple[int, str]:
+        """
+        Estimate progress from the running node, the completed outputs or the elapsed time
+        
+        Returns:
+            Tuple of (percentage, description)
+        """
+        # The running node is the best indication, with time-based interpolation during frame generation
+        if current_node in _STAGE_PERCENTAGES:
+            if current_node == "27":
+                progress_pct = self._estimate_node27_progress(elapsed_time)
+            else:
+                progress_pct = _STAGE_PERCENTAGES[current_node]
+            return progress_pct, f"Processing: {_NODE_DESCRIPTIONS.get(current_node, 'Processing')}"
+        
+        # Otherwise go by the furthest stage that has finished
+        completed = [_STAGE_PERCENTAGES[node_id] for node_id in outputs if node_id in _STAGE_PERCENTAGES]
+        if completed:
+            return max(completed), "Processing"
+        
+        # Fall back to a time-based estimate
+        return min(90, int((elapsed_time / _ESTIMATED_TOTAL_SECONDS) * 100)), "Processing"
+    
+    def _poll_for_workflow_completion(self, prompt_id: str, start_time: float, timeout_minutes: int, 
+                                      status_callback=None, min_check_interval: float = POLL_INTERVAL_MIN,
+                                      max_check_interval: float = POLL_INTERVAL_MAX) -> bool:
+        """Wait for workflow completion by polling /history and the queue"""
+        # Calculate timeout
+        timeout_seconds = timeout_minutes * 60
+        check_interval = min_check_interval  # Grows while nothing changes, see POLL_BACKOFF_FACTOR
+        last_progress_state = None
+        last_queue_position = None
+        last_update_time = float("-inf")
+        
+        # Wait a moment before first check
+        time.sleep(1)
         
-        # Progress estimate - video generation usually takes around 5-10 minutes
-        # Each frame takes about 15-20 seconds to generate
-        estimated_total_time = 600  # 10 minutes estimated total time
         progress_interval = 5  # Update progress every 5 seconds (reduced from 10)
         
         # Flags to track state
         prompt_left_queue = False
         showed_finalizing = False
-        consecutive_not_in_queue = 0  # Count consecutive times the prompt is not found in queue
-        required_not_in_queue = 5     # Require more consecutive checks before concluding it left the queue
         last_node_executing = None
         
-        # Estimate frame-based progress
-        frames_per_minute = 3  # Approximately 3 frames per minute (20s per frame)
-        generating_progress_base = 40  # Start at 40% when frame generation begins
-        generating_progress_max = 85   # Max at 85% before decoding
-        
-        # Map to keep track of nodes reported as complete for status display
+        # Integer IDs of nodes seen completing, and those still to be reported in status updates
         reported_nodes = set()
+        completed_events = deque()
+        last_outputs_len = 0
+        completed_percentage = 0  # Highest stage percentage among completed nodes
         
         while True:
-            # Check for timeout
-            elapsed_time = time.time() - start_time
+            # Check for timeout, reading the clock once per pass
+            now = time.monotonic()
+            elapsed_time = now - start_time
             if elapsed_time > timeout_seconds:
                 logger.error(f"⏰ Workflow processing timed out after {timeout_minutes} minutes")
                 return False
             
+            # Request history and queue status together, so each pass costs one round trip;
+            # the queue is the only live view of a running prompt, as history appears on completion
+            history_future = self._executor.submit(self.check_workflow_status, prompt_id)
+            queue_future = None if prompt_left_queue else self._executor.submit(self.get_queue_status, prompt_id)
+            
             # Check history for completion status first
-            is_complete, history_data, error_msg = self.check_workflow_status(prompt_id)
+            is_complete, history_data, error_msg = history_future.result()
             
-            # If we're complete, return immediately
+            # If we're complete, return immediately (this includes node 30 having produced output)
             if is_complete:
                 if status_callback:
-                    status_callback("100% - Complete")
+                    self._emit_status(status_callback, "100% - Complete")
                 logger.info("✅ Workflow completed successfully")
                 return True
             
             # Extract data from history_data
             # This could be either directly in history_data or nested in prompt_id key
-            outputs = {}
-            executing = []
-            prompt_data = history_data.get(prompt_id, {}) if history_data else {}
+            source = (history_data.get(prompt_id) or history_data) if history_data else {}
+            outputs = source.get("outputs", {})
+            executing = source.get("executing", [])
             
-            # Check for outputs in both locations
-            if prompt_data and "outputs" in prompt_data:
-                outputs = prompt_data["outputs"]
-            elif history_data and "outputs" in history_data:
-                outputs = history_data["outputs"]
+            # Poll quickly while the history is changing and back off while it isn't
+            # (outputs only ever grow, so their count is enough to spot new ones)
+            progress_state = (len(outputs), str(executing))
+            if progress_state != last_progress_state:
+                last_progress_state = progress_state
+                check_interval = min_check_interval
+            else:
+                check_interval = min(check_interval * POLL_BACKOFF_FACTOR, max_check_interval)
             
-            # Check for executing nodes in both locations
-            if prompt_data and "executing" in prompt_data:
-                executing = prompt_data["executing"]
-            elif history_data and "executing" in history_data:
-                executing = history_data["executing"]
+            # Outputs only ever grow, so look for newly completed nodes only when they have
+            if len(outputs) != last_outputs_len:
+                last_outputs_len = len(outputs)
+                executed_nodes = {int(node_id) for node_id in outputs if node_id.isdigit()}  # Only track numbered nodes
+                for node_id in sorted(executed_nodes - reported_nodes):
+                    logger.debug(f"✅ Completed node {node_id}: {_NODE_DESCRIPTIONS_BY_ID.get(node_id) or f'Step {node_id}'}")
+                    reported_nodes.add(node_id)
+                    completed_events.append(node_id)
             
-            # Quick check for node 30
-            if "30" in outputs:
-                if status_callback:
-                    status_callback("100% - Complete")
-                logger.info("✅ Workflow completed successfully (found node 30 output)")
-                return True
-            
-            # Build a progress summary based on completed nodes
-            if outputs and status_callback and time.time() - last_update_time > progress_interval:
-                executed_nodes = set()
-                for node_id in outputs:
-                    if node_id.isdigit():  # Only track numbered nodes
-                        executed_nodes.add(node_id)
-                        
-                # Get the highest completed node stage percentage
-                completed_percentage = 0
-                for node_id in executed_nodes:
-                    if node_id in stage_percentages:
-                        completed_percentage = max(completed_percentage, stage_percentages[node_id])
+            # Report completed nodes in order, with one status update for the latest
+            if completed_events and status_callback and now - last_update_time > progress_interval:
+                while completed_events:
+                    latest_node = completed_events.popleft()
+                    completed_percentage = max(completed_percentage, _STAGE_PERCENTAGES_BY_ID.get(latest_node, 0))
+                latest_desc = _NODE_DESCRIPTIONS_BY_ID.get(latest_node) or f"Step {latest_node}"
                 
-                # Add nodes that have been completed but not yet reported
-                new_completed = executed_nodes - reported_nodes
-                if new_completed:
-                    # Update reported nodes
-                    reported_nodes.update(new_completed)
-                    
-                    # Find the latest completed node for reporting
-                    latest_node = max(new_completed, key=lambda x: int(x) if x.isdigit() else 0)
-                    latest_desc = node_descriptions.get(latest_node, f"Step {latest_node}")
-                    
-                    logger.info(f"✅ Completed node {latest_node}: {latest_desc}")
-                    
-                    # Update status with the latest completed node
-                    status_callback(f"{completed_percentage}% - Completed: {latest_desc}")
-                    last_update_time = time.time()
+                logger.info(f"✅ Completed node {latest_node}: {latest_desc}")
+                
+                # Update status with the latest completed node
+                self._emit_status(status_callback, f"{completed_percentage}% - Completed: {latest_desc}")
+                last_update_time = now
             
             # Check queue status periodically
-            if not prompt_left_queue and time.time() - last_queue_check_time > queue_check_interval:
-                last_queue_check_time = time.time()
-                
+            if queue_future is not None:
                 # Get the queue information
-                queue_info = self.get_queue_status(prompt_id)
+                queue_info = queue_future.result()
                 is_in_queue = queue_info.get("is_in_queue", False)
                 queue_position = queue_info.get("queue_position")
                 queue_running = queue_info.get("queue_running", False)
                 
                 # If prompt is in queue
                 if is_in_queue:
-                    consecutive_not_in_queue = 0  # Reset counter
-                    
                     # If we're in the pending queue
                     if queue_position is not None and queue_position > 0:
+                        # Moving up the queue counts as progress
+                        if queue_position != last_queue_position:
+                            last_queue_position = queue_position
+                            check_interval = min_check_interval
+                        
                         queue_size = queue_info.get("queue_size", 0)
                         if status_callback:
                             status = f"0% - Queued: Position {queue_position} of {queue_size}"
-                            status_callback(status)
+                            self._emit_status(status_callback, status)
                         logger.info(f"⌛ Prompt queued at position {queue_position} of {queue_size}")
                         time.sleep(check_interval)
                         continue
                     
-                    # If we're running
+                    # If we're running, note which node is executing
                     elif queue_running:
-                        # Check for progress info in the queue response
-                        current_node = None
-                        progress_pct = None
+                        # Leaving the pending queue to start running counts as progress
+                        if last_queue_position != 0:
+                            last_queue_position = 0
+                            check_interval = min_check_interval
                         
-                        if "queue_details" in queue_info and "current_node" in queue_info["queue_details"]:
-                            current_node = queue_info["queue_details"]["current_node"]
+                        current_node = (queue_info.get("queue_details") or {}).get("current_node")
+                        if current_node and current_node.isdigit():
                             last_node_executing = current_node
-                            
-                            # Update the last node executing
-                            if current_node and current_node.isdigit():
-                                last_node_executing = current_node
-                                
-                                # Get progress percentage based on current node
-                                if current_node in stage_percentages:
-                                    progress_pct = stage_percentages[current_node]
-                                    
-                                    # If we're in the frame generation stage, estimate progress based on elapsed time
-                                    if current_node == "27":  # Generating frames
-                                        # Estimate progress based on elapsed time for frame generation
-                                        generation_time = elapsed_time - 60  # Subtract time for setup
-                                        if generation_time > 0:
-                                            # Calculate progress within the generating stage
-                                            progress_range = generating_progress_max - generating_progress_base
-                                            progress_pct = generating_progress_base + min(progress_range, 
-                                                                                        int((generation_time / 240) * progress_range))
-                            
-                            # If we have a node but no percentage, use the stage percentages
-                            if progress_pct is None and current_node in stage_percentages:
-                                progress_pct = stage_percentages[current_node]
-                        
-                        # If no node info, use time-based estimate
-                        if progress_pct is None:
-                            progress_pct = min(90, int((elapsed_time / estimated_total_time) * 100))
-                        
-                        # Get node description
-                        node_desc = node_descriptions.get(current_node, "Processing")
-                        
-                        # Update status with specific node name
-                        if status_callback and time.time() - last_update_time > progress_interval:
-                            last_update_time = time.time()
-                            status = f"{progress_pct}% - Processing: {node_desc}"
-                            status_callback(status)
-                            logger.debug(f"⏳ Current node: {current_node} - {node_desc} ({progress_pct}%)")
-                        
-                        time.sleep(check_interval)
-                        continue
                 else:
-                    # Not in queue - increment counter
-                    consecutive_not_in_queue += 1
-                    
-                    # Check if there's node activity even if not in queue
-                    if executing:
-                        # There are executing nodes - we should reset the counter
-                        consecutive_not_in_queue = 0
-                        logger.debug(f"Prompt not in queue but has executing nodes: {executing}")
-                    
-                    # Only consider it left the queue after multiple consecutive checks
-                    # and when history data shows signs of processing
-                    if consecutive_not_in_queue >= required_not_in_queue:
-                        # Double check that we have outputs showing we're processing
-                        has_outputs = bool(outputs)
+                    # Once the prompt is out of the queue and has produced outputs, stop polling the queue
+                    if outputs:
+                        logger.info("✓ Prompt has left the execution queue, continuing with history checks")
+                        prompt_left_queue = True
                         
-                        if has_outputs:
-                            logger.info("✓ Prompt has left the execution queue, continuing with history checks")
-                            prompt_left_queue = True
-                            
-                            # Only show finalizing once
-                            if not showed_finalizing and status_callback:
-                                showed_finalizing = True
-                                status = "95% - Finalizing"
-                                status_callback(status)
+                        # Only show finalizing once
+                        if not showed_finalizing and status_callback:
+                            showed_finalizing = True
+                            status = "95% - Finalizing"
+                            self._emit_status(status_callback, status)
             
             # If there's an error, log it and return failure
             if error_msg and "Error:" in error_msg:
                 logger.error(f"❌ Workflow failed: {error_msg}")
                 if status_callback:
-                    status_callback(f"Error: {error_msg}")
+                    self._emit_status(status_callback, f"Error: {error_msg}")
                 return False
             
-            # If we have history data, track progress with executed nodes
-            if outputs:
-                executed_nodes = set()
-                for node_id in outputs:
-                    if node_id.isdigit():  # Only track numbered nodes
-                        executed_nodes.add(node_id)
-                
-                # Report newly executed nodes
-                new_executed = executed_nodes - known_executed_nodes
-                for node_id in sorted(new_executed, key=int):
-                    desc = node_descriptions.get(node_id, f"Step {node_id}")
-                    logger.debug(f"✅ Completed node {node_id}: {desc}")
-                
-                # Update known executed nodes
-                known_executed_nodes = executed_nodes
-                
-                # If we found node 30 in outputs, we're definitely done
-                if "30" in executed_nodes:
-                    if status_callback:
-                        status_callback("100% - Complete")
-                    logger.info("✅ Workflow completed successfully")
-                    return True
-            
-            # Check if there are executing nodes
-            if executing:
-                for node_id in executing:
-                    if node_id.isdigit():
-                        # Update the last node executing
-                        last_node_executing = node_id
-                        
-                        # Report currently executing node with more detailed description
-                        if node_id in node_descriptions and time.time() - last_update_time > progress_interval:
-                            desc = node_descriptions[node_id]
-                            progress_pct = stage_percentages.get(node_id, 50)
-                            
-                            # If we're in frame generation, provide more granular updates
-                            if node_id == "27":
-                                # Calculate progress within the generating stage
-                                generation_time = elapsed_time - 60  # Subtract time for setup
-                                if generation_time > 0:
-                                    progress_range = generating_progress_max - generating_progress_base
-                                    progress_pct = generating_progress_base + min(progress_range, 
-                                                                                int((generation_time / 240) * progress_range))
-                            
-                            # Show node-specific progress
-                            if status_callback:
-                                last_update_time = time.time()
-                                status = f"{progress_pct}% - Processing: {desc}"
-                                status_callback(status)
-                                logger.debug(f"⏳ Processing node {node_id}: {desc} ({progress_pct}%)")
+            # Note the latest executing node reported by the history
+            for node_id in executing:
+                if node_id.isdigit():
+                    last_node_executing = node_id
             
-            # For time-based progress updates if nothing else is happening
-            if time.time() - last_update_time > progress_interval:
-                last_update_time = time.time()
-                
-                # Estimate progress based on elapsed time and last known node
-                progress_pct = None
-                
-                if last_node_executing and last_node_executing in stage_percentages:
-                    progress_pct = stage_percentages[last_node_executing]
-                    
-                    # If in frame generation, estimate progress
-                    if last_node_executing == "27":
-                        generation_time = elapsed_time - 60
-                        if generation_time > 0:
-                            progress_range = generating_progress_max - generating_progress_base
-                            progress_pct = generating_progress_base + min(progress_range, 
-                                                                        int((generation_time / 240) * progress_range))
-                
-                # Fall back to time-based estimate if we don't have node info
-                if progress_pct is None:
-                    progress_pct = min(90, int((elapsed_time / estimated_total_time) * 100))
-                
-                if status_callback:
-                    desc = "Processing"
-                    if last_node_executing and last_node_executing in node_descriptions:
-                        desc = node_descriptions[last_node_executing]
-                        
-                    status = f"{progress_pct}% - {desc}"
-                    status_callback(status)
+            # One progress update per pass at most, however the progress was learned
+            if status_callback and now - last_update_time > progress_interval:
+                last_update_time = now
+                progress_pct, desc = self._compute_progress(last_node_executing, elapsed_time, outputs)
+                self._emit_status(status_callback, f"{progress_pct}% - {desc}")
+                logger.debug(f"⏳ Current node: {last_node_executing} - {desc} ({progress_pct}%)")
             
-            # Adaptive waiting: increase interval gradually to reduce polling frequency
-            check_interval = min(8, check_interval * 1.05)  # Cap at 8 seconds, slower growth
             time.sleep(check_interval) 
\ No newline at end of file
@@ -1,10 +1,26 @@
 import requests
 import json
 import logging
+import os
+import time
+import socket
+import hashlib
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Dict, Optional, List, Any
 
 logger = logging.getLogger(__name__)
 
+# How long a ComfyUI URL that passed its connection test is reused before looking it up again
+COMFYUI_URL_CACHE_TTL = 60.0
+
+# Where the ComfyUI URL is kept between runs (reused for COMFYUI_URL_CACHE_TTL seconds)
+COMFYUI_URL_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "comput3", "comfyui_url.json")
+
+# How long a successful running-workloads listing is reused before asking the API again
+WORKLOADS_CACHE_TTL = 5.0
+
 class Comput3API:
     """Client for interacting with Comput3 API"""
     
@@ -12,9 +28,30 @@ class Comput3API:
         """Initialize with Comput3 API key"""
         self.api_key = api_key
         self.api_url = "https://api.comput3.ai/api/v0/workloads"
+        self.session = self._create_session()
+        self._cached_comfyui_url: Optional[str] = None
+        self._cached_at = 0.0
+        self._cached_workloads: Optional[List[Dict[str, Any]]] = None
+        self._workloads_cached_at = 0.0
         
         if not api_key:
             logger.error("🔑 C3 API key is not provided. Please set your C3_API_KEY in .env file.")
+    
+    def _create_session(self) -> requests.Session:
+        """Create a pooled keep-alive session for the workloads API and ComfyUI URL checks"""
+        session = requests.Session()
+        session.headers.update(self.get_headers())
+        
+        # Retry idempotent requests on transient gateway errors
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=8,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504], raise_on_status=False)
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        
+        return session
         
     def get_headers(self) -> Dict[str, str]:
         """Get the headers for API requests"""
@@ -34,10 +71,12 @@ class Comput3API:
             logger.error("❌ Cannot get workloads: C3 API key is missing")
             return []
         
+        if self._cached_workloads is not None and time.monotonic() - self._workloads_cached_at < WORKLOADS_CACHE_TTL:
+            return self._cached_workloads
+        
         try:
-            response = requests.post(
+            response = self.session.post(
                 self.api_url,
-                headers=self.get_headers(),
                 json={"running": True}
             )
             
@@ -47,6 +86,8 @@ class Comput3API:
             
             workloads = response.json()
             logger.info(f"🔍 Found {len(workloads)} running workloads")
+            self._cached_workloads = workloads
+            self._workloads_cached_at = time.monotonic()
             return workloads
             
         except Exception as e:
@@ -57,20 +98,69 @@ class Comput3API:
         """Get a running media instance if available"""
         workloads = self.get_running_workloads()
         
-        # Filter for media instances
-        media_instances = [w for w in workloads if w.get("type", "").startswith("media")]
+        # Stop at the first media instance instead of filtering the whole list
+        instance = next((w for w in workloads if (w.get("type") or "").startswith("media")), None)
         
-        if not media_instances:
+        if instance is None:
             logger.warning("⚠️ No running media instances found")
             return None
         
-        # Return the first media instance
-        instance = media_instances[0]
         logger.info(f"✅ Found media instance: {instance.get('node')} (type: {instance.get('type')})")
         return instance
     
+    def invalidate_comfyui_url(self):
+        """Forget the cached ComfyUI URL, e.g. after a connection failure"""
+        self._cached_comfyui_url = None
+        self._cached_at = 0.0
+        self._cached_workloads = None
+        try:
+            os.remove(COMFYUI_URL_CACHE_PATH)
+        except OSError:
+            pass
+    
+    def _api_key_digest(self) -> str:
+        """Identify the account a cached URL belongs to without storing the API key"""
+        return hashlib.sha256(self.api_key.encode("utf-8")).hexdigest()
+    
+    def _read_cached_comfyui_url(self) -> Optional[str]:
+        """Read the ComfyUI URL cached by a recent run with the same API key, if any"""
+        try:
+            if time.time() - os.path.getmtime(COMFYUI_URL_CACHE_PATH) >= COMFYUI_URL_CACHE_TTL:
+                return None
+            with open(COMFYUI_URL_CACHE_PATH, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            if isinstance(cache, dict) and cache.get("key") == self._api_key_digest():
+                return cache.get("url")
+        except (OSError, ValueError):
+            pass
+        return None
+    
+    def _write_cached_comfyui_url(self, comfyui_url: str):
+        """Store the ComfyUI URL for later runs"""
+        try:
+            os.makedirs(os.path.dirname(COMFYUI_URL_CACHE_PATH), exist_ok=True)
+            
+            # Write to a temporary file and rename it, so concurrent runs never read a partial file
+            tmp_path = f"{COMFYUI_URL_CACHE_PATH}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"key": self._api_key_digest(), "url": comfyui_url}, f)
+            os.replace(tmp_path, COMFYUI_URL_CACHE_PATH)
+        except OSError as e:
+            logger.warning(f"⚠️ Failed to cache ComfyUI URL: {str(e)}")
+    
     def get_comfyui_url(self) -> Optional[str]:
         """Get the ComfyUI URL for a running media instance"""
+        if self._cached_comfyui_url and time.monotonic() - self._cached_at < COMFYUI_URL_CACHE_TTL:
+            return self._cached_comfyui_url
+        
+        # A recent run may already have found and tested the URL
+        comfyui_url = self._read_cached_comfyui_url()
+        if comfyui_url:
+            logger.info(f"🌐 ComfyUI URL (cached): {comfyui_url}")
+            self._cached_comfyui_url = comfyui_url
+            self._cached_at = time.monotonic()
+            return comfyui_url
+        
         instance = self.get_media_instance()
         
         if not instance or "node" not in instance:
@@ -85,12 +175,18 @@ class Comput3API:
             
         logger.info(f"🌐 ComfyUI URL: {comfyui_url}")
         
-        # Test connection to URL
+        # Test that the host accepts connections, and only reuse the URL later if it does
+        # (a TCP connect is enough here; ComfyUIClient opens its own HTTPS connections)
         try:
-            test_response = requests.head(comfyui_url, timeout=5)
-            if test_response.status_code >= 400:
-                logger.warning(f"⚠️ ComfyUI URL test failed with status code: {test_response.status_code}")
-        except requests.exceptions.RequestException as e:
+            parsed_url = urlparse(comfyui_url)
+            with socket.create_connection((parsed_url.hostname, parsed_url.port or 443), timeout=3):
+                pass
+            self._cached_comfyui_url = comfyui_url
+            self._cached_at = time.monotonic()
+            self._write_cached_comfyui_url(comfyui_url)
+        except (OSError, ValueError) as e:
+            # Don't let this or a later run reuse a URL, or workloads, that may be stale
+            self.invalidate_comfyui_url()
             logger.warning(f"⚠️ ComfyUI URL may be incorrect, connection test failed: {str(e)}")
             logger.warning("⚠️ Will attempt to use the URL anyway, but there may be connection issues")
                 
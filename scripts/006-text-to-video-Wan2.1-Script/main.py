@@ -9,26 +9,74 @@ Now with improved video downloading and authentication similar to the React web
 
 import os
 import argparse
+import json
 import sys
 import logging
-import random
-import base64
+import logging.handlers
+import shutil
+import signal
 import time
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional, Dict, List, Any, Callable
 
 from config import C3_API_KEY, DEFAULT_OUTPUT_DIR, WORKFLOW_TEMPLATE_PATH
 from comput3_api import Comput3API
-from comfyui_client import ComfyUIClient
+from comfyui_client import ComfyUIClient, _VIDEO_EXTS
+
+try:
+    import pybase64 as base64  # SIMD-accelerated drop-in for the standard module
+except ImportError:
+    import base64
 
 # For caching videos
 CACHE_DIR = os.path.join(os.getcwd(), "cache")
 
+# Log file rotation
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
+# Progress updates are logged here; per-tick queue updates are only kept with --verbose
+status_logger = logging.getLogger("status")
+
+# Bytes of video encoded per step; a multiple of 3 so only the last chunk gets base64 padding
+BASE64_CHUNK_SIZE = 3 * 1024 * 1024
+
+# File buffer size for reading videos and writing cache files
+CACHE_IO_BUFFER_SIZE = 1024 * 1024
+
+# MIME types for the base64 data URLs of cached videos
+_MIME = {'.mp4': 'video/mp4', '.webm': 'video/webm', '.mov': 'video/quicktime', '.avi': 'video/x-msvideo',
+         '.mkv': 'video/x-matroska'}
+
+# Progress bar glyphs and ANSI escape sequence for clearing the line
+_SPINNER = ('⣾', '⣽', '⣻', '⢿', '⡿', '⣟', '⣯', '⣷')
+_ERASE_LINE = '\033[2K'
+
+def _build_bars() -> List[str]:
+    """Build the progress bar for every fill length from empty to full, sized to the terminal"""
+    term_width = shutil.get_terminal_size((80, 24)).columns
+    bar_length = max(0, min(40, term_width - 30))  # Ensure the bar fits in the terminal
+    return ['█' * i + '░' * (bar_length - i) for i in range(bar_length + 1)]
+
+# Progress bars for the terminal width, rebuilt when the terminal is resized
+_BARS = _build_bars()
+
+def _refresh_terminal_width(*_):
+    """Re-read the terminal width after a resize"""
+    global _BARS
+    _BARS = _build_bars()
+
 def parse_arguments():
     """Parse command-line arguments"""
     parser = argparse.ArgumentParser(description="Generate videos from text prompts using Comput3")
-    parser.add_argument("--prompt", "-p", type=str, required=True, 
-                        help="Text prompt describing the video to generate")
+    prompt_group = parser.add_mutually_exclusive_group(required=True)
+    prompt_group.add_argument("--prompt", "-p", type=str, 
+                              help="Text prompt describing the video to generate")
+    prompt_group.add_argument("--prompts-file", type=str,
+                              help="JSONL file of prompts to queue together, one per line: a JSON string or an "
+                                   "object with \"prompt\" and optional \"negative_prompt\" and \"seed\"")
     parser.add_argument("--negative-prompt", "-n", type=str, default="poor quality, blurry, pixelated, low resolution, watermark, signature, text, letters, words", 
                         help="Negative prompt to guide the generation away from unwanted content")
     parser.add_argument("--width", "-W", type=int, default=832,
@@ -51,6 +99,8 @@ def parse_arguments():
                         help="Cache videos for faster access in case of network issues")
     parser.add_argument("--cache-dir", type=str, default=CACHE_DIR,
                         help=f"Directory to store cached videos (default: {CACHE_DIR})")
+    parser.add_argument("--cache-format", type=str, choices=["raw", "base64"], default="raw",
+                        help="Store cached videos as-is (hardlinked where possible) or as base64 data URLs (default: raw)")
     parser.add_argument("--verbose", "-v", action="store_true", help="Enable verbose logging")
     
     return parser.parse_args()
@@ -69,20 +119,26 @@ def setup_logging(verbose: bool = False):
             # If the record has the 'console' attribute and it's False, don't show on console
             return not (hasattr(record, 'console') and record.console is False)
     
-    # Create handlers
-    file_handler = logging.FileHandler(log_file)
+    # Create handlers (the log file is only opened once something is written to it)
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, delay=True
+    )
     console_handler = logging.StreamHandler()
     
     # Add filter to console handler only
     console_handler.addFilter(ConsoleFilter())
     
-    # Configure logging
+    # Configure logging (replacing the console-only setup done when config is imported)
     logging.basicConfig(
         level=log_level,
         format="%(asctime)s - %(levelname)s - %(message)s",
-        handlers=[file_handler, console_handler]
+        handlers=[file_handler, console_handler],
+        force=True
     )
     
+    # Keep progress milestones, but skip formatting and writing a record for every queue tick
+    status_logger.setLevel(logging.DEBUG if verbose else logging.INFO)
+    
     logging.info(f"📝 Logging to: {log_file}")
 
 def check_requirements():
@@ -102,13 +158,6 @@ def check_requirements():
 
 def print_status_update(status: str):
     """Print a status update to the console with a progress bar"""
-    # Get terminal width
-    try:
-        import shutil
-        width = shutil.get_terminal_size().columns
-    except:
-        width = 80
-    
     # Parse the status to extract percentage and message
     parts = status.split(" - ", 1)
     percentage = parts[0] if parts else "??%"
@@ -117,14 +166,10 @@ def print_status_update(status: str):
     # Determine if we're in queue or processing
     is_queue = "Queued:" in message
     
-    # Create a progress bar
-    bar_length = min(40, width - 30)  # Ensure the bar fits in the terminal
-    
     # For queued status, use a different style of progress bar
     if is_queue:
         # For queued items, show a waiting animation
-        spinner = '⣾⣽⣻⢿⡿⣟⣯⣷'[int(time.time() * 3) % 8]
-        bar = spinner * 3
+        bar = _SPINNER[int(time.time() * 3) % 8] * 3
     else:
         try:
             # Extract percentage value
@@ -132,55 +177,61 @@ def print_status_update(status: str):
         except ValueError:
             pct_value = 0
             
-        filled_length = int(bar_length * pct_value / 100)
-        bar = '█' * filled_length + '░' * (bar_length - filled_length)
-    
-    # ANSI escape sequences for clearing line
-    CURSOR_UP_ONE = '\033[1A'
-    ERASE_LINE = '\033[2K'
-    
-    # Move cursor to beginning of line and clear it
-    print(f"\r{ERASE_LINE}", end="")
-    
-    # For queued status, show queue position with spinner
+        # Read the table once, as a resize can replace it while a callback is running
+        bars = _BARS
+        bar_length = len(bars) - 1
+        filled_length = min(max(int(bar_length * pct_value / 100), 0), bar_length)
+        bar = bars[filled_length]
+    
+    # Clear the line and redraw it in a single write;
+    # for queued status, show queue position with spinner
     if is_queue:
-        print(f"\r⌛ {bar} {message}", end="", flush=True)
+        sys.stdout.write(f"\r{_ERASE_LINE}\r⌛ {bar} {message}")
+        sys.stdout.flush()
         # Also log to file for reference but not to console
-        logging.info(f"Queue status: {message}", extra={"console": False})
+        status_logger.debug(f"Queue status: {message}", extra={"console": False})
     else:
         # Show progress bar with percentage
-        print(f"\r🔄 [{bar}] {percentage} - {message}", end="", flush=True)
+        sys.stdout.write(f"\r{_ERASE_LINE}\r🔄 [{bar}] {percentage} - {message}")
+        sys.stdout.flush()
         
         # Log significant progress milestones to file
-        if "Complete" in message:
+        if "Completed:" in message:
+            status_logger.info(f"Progress: {message}", extra={"console": False})
+        elif "Complete" in message:
             # Complete is handled in the client
             pass
-        elif "Completed:" in message:
-            logging.info(f"Progress: {message}", extra={"console": False})
         elif "error" in message.lower():
-            logging.error(f"Error: {message}", extra={"console": False})
+            status_logger.error(f"Error: {message}", extra={"console": False})
+
+def make_status_printer() -> Callable[[str], None]:
+    """Create a status callback that only redraws the progress bar when the status changes"""
+    last_status = None
+    
+    def print_changed_status(status: str):
+        nonlocal last_status
+        # Queued statuses are always redrawn so the spinner keeps moving while waiting
+        if status != last_status or "Queued:" in status:
+            last_status = status
+            print_status_update(status)
+    
+    return print_changed_status
 
 def store_video_as_base64(video_path: str, cache_dir: str, filename: str) -> Optional[str]:
     """Store a video as base64 for caching"""
     try:
         os.makedirs(cache_dir, exist_ok=True)
         
-        # Read the video file
-        with open(video_path, 'rb') as f:
-            video_data = f.read()
-        
-        # Detect mime type (naive approach)
-        ext = Path(video_path).suffix.lower()
-        mime_type = "video/mp4" if ext == '.mp4' else "video/webm"
+        # Detect mime type from the extension
+        mime_type = _MIME.get(Path(video_path).suffix.lower(), 'application/octet-stream')
         
-        # Convert to base64
-        base64_data = base64.b64encode(video_data).decode('utf-8')
-        data_url = f"data:{mime_type};base64,{base64_data}"
-        
-        # Save to cache file
+        # Encode the video chunk by chunk straight into the cache file
         cache_file = os.path.join(cache_dir, f"{filename}.b64")
-        with open(cache_file, 'w') as f:
-            f.write(data_url)
+        with open(video_path, 'rb', buffering=CACHE_IO_BUFFER_SIZE) as fin, \
+             open(cache_file, 'wb', buffering=CACHE_IO_BUFFER_SIZE) as fout:
+            fout.write(f"data:{mime_type};base64,".encode('ascii'))
+            while chunk := fin.read(BASE64_CHUNK_SIZE):
+                fout.write(base64.b64encode(chunk))
         
         logging.info(f"🗄️ Stored video as base64 in: {cache_file}")
         return cache_file
@@ -189,95 +240,80 @@ def store_video_as_base64(video_path: str, cache_dir: str, filename: str) -> Opt
         logging.error(f"❌ Error storing video as base64: {str(e)}")
         return None
 
-def load_video_from_base64(cache_dir: str, filename: str) -> Optional[str]:
-    """Load a cached base64 video"""
-    cache_file = os.path.join(cache_dir, f"{filename}.b64")
-    
-    if os.path.exists(cache_file):
+def _copy_file(src: str, dst: str):
+    """Copy a file in the kernel where supported, otherwise through shutil"""
+    if hasattr(os, "copy_file_range"):
         try:
-            with open(cache_file, 'r') as f:
-                return f.read()
-        except Exception as e:
-            logging.error(f"❌ Error loading cached video: {str(e)}")
-    
-    return None
+            with open(src, 'rb') as fin, open(dst, 'wb') as fout:
+                remaining = os.fstat(fin.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(fin.fileno(), fout.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            if remaining == 0:
+                return
+        except OSError:
+            pass
+    shutil.copyfile(src, dst)
 
-def main():
-    """Main entry point"""
-    # Parse arguments
-    args = parse_arguments()
-    setup_logging(args.verbose)
-    
-    print("=" * 60)
-    print("🎬 Comput3 Text-to-Video Generator")
-    print("=" * 60)
-    
-    # Check requirements
-    if not check_requirements():
-        return 1
-    
-    # Create output directory
-    os.makedirs(args.output_dir, exist_ok=True)
-    
-    # Create cache directory if caching is enabled
-    if args.cache:
-        os.makedirs(args.cache_dir, exist_ok=True)
-    
-    # Create debug directory for workflow payloads
-    debug_dir = os.path.join(os.getcwd(), "debug")
-    os.makedirs(debug_dir, exist_ok=True)
-    
-    # Generate a random seed if not provided
-    seed = args.seed if args.seed is not None else random.randint(0, 2**32 - 1)
-    logging.info(f"🎲 Using seed: {seed}")
-    
-    # Initialize Comput3 API client
-    logging.info("🚀 Initializing Comput3 API client...")
-    c3_client = Comput3API(C3_API_KEY)
-    
-    # Get ComfyUI URL from running instance
-    comfyui_url = c3_client.get_comfyui_url()
-    if not comfyui_url:
-        logging.error("❌ No running media instance found.")
-        logging.error("💡 Please launch a media instance first at https://launch.comput3.ai")
-        return 1
-    
-    logging.info(f"🖥️ Using ComfyUI instance at: {comfyui_url}")
-    
-    # Initialize ComfyUI client
-    comfy_client = ComfyUIClient(comfyui_url, C3_API_KEY)
-    
-    # Step 1: Load and update workflow
-    logging.info("📋 Loading workflow template...")
+def cache_video(video_path: str, cache_dir: str, filename: str) -> Optional[str]:
+    """Cache a video by hardlinking it, or copying it when a link isn't possible"""
     try:
-        workflow = comfy_client.load_workflow(WORKFLOW_TEMPLATE_PATH)
+        os.makedirs(cache_dir, exist_ok=True)
+        cache_file = os.path.join(cache_dir, filename)
+        
+        if os.path.exists(cache_file):
+            # Nothing to do if the cache directory is the output directory
+            if os.path.samefile(video_path, cache_file):
+                return cache_file
+            os.remove(cache_file)
+        
+        try:
+            os.link(video_path, cache_file)
+        except OSError:
+            # Different filesystem, or links not supported
+            _copy_file(video_path, cache_file)
+        
+        logging.info(f"🗄️ Cached video in: {cache_file}")
+        return cache_file
+        
     except Exception as e:
-        logging.error(f"❌ Failed to load workflow template: {str(e)}")
-        return 1
-    
-    # Update workflow with prompts and parameters
-    logging.info("🔄 Updating workflow with inputs...")
-    updated_workflow = comfy_client.update_text_to_video_workflow(
-        workflow,
-        positive_prompt=args.prompt,
-        negative_prompt=args.negative_prompt,
-        width=args.width,
-        height=args.height,
-        frames=args.frames,
-        fps=args.fps,
-        seed=seed,
-        steps=args.steps
-    )
-    
-    # Step 2: Queue workflow
-    logging.info("🚀 Queueing workflow...")
-    prompt_id = comfy_client.queue_workflow(updated_workflow)
-    
-    if not prompt_id:
-        logging.error("❌ Failed to queue workflow. Exiting.")
-        return 1
-    
-    logging.info(f"✅ Workflow queued with ID: {prompt_id}")
+        logging.error(f"❌ Error caching video: {str(e)}")
+        return None
+
+def find_cached_video(cache_dir: str, filename: str, cache_format: str = "raw") -> Optional[str]:
+    """Get the path of a cached video, if there is one"""
+    cache_file = os.path.join(cache_dir, f"{filename}.b64" if cache_format == "base64" else filename)
+    return cache_file if os.path.isfile(cache_file) else None
+
+def load_prompts_file(path: str, default_negative_prompt: str, default_seed: Optional[int]) -> List[Dict[str, Any]]:
+    """Read prompts from a JSONL file, one JSON string or object per line"""
+    jobs = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            
+            entry = json.loads(line)
+            if isinstance(entry, str):
+                entry = {"prompt": entry}
+            if not isinstance(entry, dict) or not entry.get("prompt"):
+                raise ValueError(f"line {line_number} has no prompt")
+            
+            jobs.append({
+                "prompt": entry["prompt"],
+                "negative_prompt": entry.get("negative_prompt", default_negative_prompt),
+                "seed": entry.get("seed", default_seed)
+            })
+    return jobs
+
+def wait_and_download(comfy_client: ComfyUIClient, args: argparse.Namespace, job: Dict[str, Any], prompt_id: str,
+                      cache_executor: Optional[ThreadPoolExecutor], store_in_cache: Callable) -> int:
+    """Wait for a queued workflow to finish and download its video"""
+    # Repeated statuses (e.g. while polling) don't need redrawing
+    status_printer = make_status_printer()
     
     # Log initial queue status
     queue_info = comfy_client.get_queue_status(prompt_id)
@@ -286,17 +322,17 @@ def main():
     
     if queue_position is not None and queue_position > 0:
         logging.info(f"⌛ Initial queue position: {queue_position+1} of {queue_size}")
-        print_status_update(f"0% - Queued: Position {queue_position+1} of {queue_size}")
+        status_printer(f"0% - Queued: Position {queue_position+1} of {queue_size}")
     else:
         logging.info("🚀 Prompt started executing immediately")
-        print_status_update("0% - Processing")
+        status_printer("0% - Processing")
     
     # Step 3: Wait for workflow to complete
     logging.info(f"⏳ Waiting for workflow to complete (max {args.timeout} minutes)...")
     if not comfy_client.wait_for_workflow_completion(
         prompt_id, 
         args.timeout, 
-        status_callback=print_status_update
+        status_callback=status_printer
     ):
         print()  # Add a newline after status updates
         logging.error("❌ Workflow processing failed or timed out.")
@@ -318,7 +354,7 @@ def main():
         return 1
     
     # Get videos from outputs
-    videos = [f for f in output_files if f.get("filename", "").lower().endswith(('.mp4', '.avi', '.mov', '.webm'))]
+    videos = [f for f in output_files if os.path.splitext(f.get("filename", ""))[1].lower() in _VIDEO_EXTS]
     
     if not videos:
         logging.error("❌ No videos found in output.")
@@ -356,34 +392,35 @@ def main():
             print(f"✨ Video generation complete! ✨")
             print(f"📁 Output saved to: {output_path}")
             
-            # If caching is enabled, also store as base64
+            # If caching is enabled, also store a copy in the background
+            cache_future = None
             if args.cache:
-                cache_path = store_video_as_base64(output_path, args.cache_dir, filename)
-                if cache_path:
-                    print(f"🗄️ Video also cached for future use")
+                cache_future = cache_executor.submit(store_in_cache, output_path, args.cache_dir, filename)
             
             # Generate direct URLs for the video
             video_url = comfy_client.get_video_url(filename, subfolder)
             
             print("\n📋 Video Details:")
-            print(f"  • Prompt: {args.prompt}")
-            print(f"  • Negative Prompt: {args.negative_prompt}")
+            print(f"  • Prompt: {job['prompt']}")
+            print(f"  • Negative Prompt: {job['negative_prompt']}")
             print(f"  • Size: {args.width}x{args.height}")
             print(f"  • Frames: {args.frames}, FPS: {args.fps}")
             print(f"  • Steps: {args.steps}")
-            print(f"  • Seed: {seed}")
+            print(f"  • Seed: {job['seed']}")
             print("\n🔗 Direct Video URL:")
             print(f"  • URL: {video_url}")
+            
+            if cache_future is not None and cache_future.result():
+                print(f"🗄️ Video also cached for future use")
             print("=" * 60)
         else:
             logging.error("❌ Failed to download video.")
             
             # Try to load from cache if available
             if args.cache:
-                cached_video = load_video_from_base64(args.cache_dir, filename)
-                if cached_video:
+                cache_file_path = find_cached_video(args.cache_dir, filename, args.cache_format)
+                if cache_file_path:
                     logging.info("🗄️ Found cached version of the video")
-                    cache_file_path = os.path.join(args.cache_dir, f"{filename}.b64")
                     print("\n" + "=" * 60)
                     print(f"⚠️ Failed to download video, but found cached version")
                     print(f"📁 Cached video data: {cache_file_path}")
@@ -392,39 +429,41 @@ def main():
             
             return 1
     else:
-        # If no videos from node 30, try to download any videos found
+        # If no videos from node 30, download all the videos found in parallel
+        # and report the first one to arrive
         success = False
-        for video in videos:
-            output_path = comfy_client.download_file(
-                video["filename"],
-                args.output_dir,
-                video["subfolder"]
-            )
-            if output_path:
-                success = True
-                
-                # If caching is enabled, also store as base64
-                if args.cache:
-                    store_video_as_base64(output_path, args.cache_dir, video["filename"])
-                
-                print("\n" + "=" * 60)
-                print(f"✨ Video generation complete! ✨")
-                print(f"📁 Output saved to: {output_path}")
-                
-                # Generate direct URL for the video
-                video_url = comfy_client.get_video_url(video["filename"], video["subfolder"])
-                
-                print("\n📋 Video Details:")
-                print(f"  • Prompt: {args.prompt}")
-                print(f"  • Negative Prompt: {args.negative_prompt}")
-                print(f"  • Size: {args.width}x{args.height}")
-                print(f"  • Frames: {args.frames}, FPS: {args.fps}")
-                print(f"  • Steps: {args.steps}")
-                print(f"  • Seed: {seed}")
-                print("\n🔗 Direct Video URL:")
-                print(f"  • URL: {video_url}")
-                print("=" * 60)
-                break
+        # Closing the iterator on the way out stops the downloads that are still waiting to start
+        with closing(comfy_client.iter_downloads(videos, args.output_dir)) as downloads:
+            for video, output_path in downloads:
+                if output_path:
+                    success = True
+                    
+                    # If caching is enabled, also store a copy in the background
+                    cache_future = None
+                    if args.cache:
+                        cache_future = cache_executor.submit(store_in_cache, output_path, args.cache_dir, video["filename"])
+                    
+                    print("\n" + "=" * 60)
+                    print(f"✨ Video generation complete! ✨")
+                    print(f"📁 Output saved to: {output_path}")
+                    
+                    # Generate direct URL for the video
+                    video_url = comfy_client.get_video_url(video["filename"], video["subfolder"])
+                    
+                    print("\n📋 Video Details:")
+                    print(f"  • Prompt: {job['prompt']}")
+                    print(f"  • Negative Prompt: {job['negative_prompt']}")
+                    print(f"  • Size: {args.width}x{args.height}")
+                    print(f"  • Frames: {args.frames}, FPS: {args.fps}")
+                    print(f"  • Steps: {args.steps}")
+                    print(f"  • Seed: {job['seed']}")
+                    print("\n🔗 Direct Video URL:")
+                    print(f"  • URL: {video_url}")
+                    print("=" * 60)
+                    
+                    if cache_future is not None:
+                        cache_future.result()
+                    break
         
         if not success:
             logging.error("❌ Failed to download any videos.")
@@ -432,6 +471,130 @@ def main():
     
     return 0
 
+def main():
+    """Main entry point"""
+    # Parse arguments
+    args = parse_arguments()
+    setup_logging(args.verbose)
+    
+    # Keep the progress bar width in step with terminal resizes (POSIX only)
+    if hasattr(signal, "SIGWINCH"):
+        signal.signal(signal.SIGWINCH, _refresh_terminal_width)
+    
+    print("=" * 60)
+    print("🎬 Comput3 Text-to-Video Generator")
+    print("=" * 60)
+    
+    # Check requirements
+    if not check_requirements():
+        return 1
+    
+    # Create output directory
+    os.makedirs(args.output_dir, exist_ok=True)
+    
+    # Create cache directory if caching is enabled, and a worker to write the cache
+    # while the results are reported
+    cache_executor = None
+    if args.cache:
+        os.makedirs(args.cache_dir, exist_ok=True)
+        cache_executor = ThreadPoolExecutor(max_workers=1)
+    store_in_cache = store_video_as_base64 if args.cache_format == "base64" else cache_video
+    
+    # Create debug directory for workflow payloads
+    debug_dir = os.path.join(os.getcwd(), "debug")
+    os.makedirs(debug_dir, exist_ok=True)
+    
+    # Collect the prompts to generate, with a random seed where none is given
+    try:
+        jobs = load_prompts_file(args.prompts_file, args.negative_prompt, args.seed) if args.prompts_file else [
+            {"prompt": args.prompt, "negative_prompt": args.negative_prompt, "seed": args.seed}
+        ]
+    except (OSError, ValueError) as e:
+        logging.error(f"❌ Failed to read prompts file: {str(e)}")
+        return 1
+    if not jobs:
+        logging.error(f"❌ No prompts found in {args.prompts_file}")
+        return 1
+    for job in jobs:
+        if job["seed"] is None:
+            job["seed"] = int.from_bytes(os.urandom(4), "little")
+    
+    # Initialize Comput3 API client
+    logging.info("🚀 Initializing Comput3 API client...")
+    c3_client = Comput3API(C3_API_KEY)
+    
+    # Get ComfyUI URL from running instance
+    comfyui_url = c3_client.get_comfyui_url()
+    if not comfyui_url:
+        logging.error("❌ No running media instance found.")
+        logging.error("💡 Please launch a media instance first at https://launch.comput3.ai")
+        return 1
+    
+    logging.info(f"🖥️ Using ComfyUI instance at: {comfyui_url}")
+    
+    # Initialize ComfyUI client
+    comfy_client = ComfyUIClient(comfyui_url, C3_API_KEY)
+    
+    # Step 1: Load and update workflow
+    logging.info("📋 Loading workflow template...")
+    try:
+        workflow = comfy_client.load_workflow(WORKFLOW_TEMPLATE_PATH)
+    except Exception as e:
+        logging.error(f"❌ Failed to load workflow template: {str(e)}")
+        return 1
+    
+    # Step 2: Queue a workflow for every prompt before waiting on any of them,
+    # so the server moves straight from one job to the next
+    queued = []
+    for job in jobs:
+        # Update workflow with prompts and parameters
+        logging.info("🔄 Updating workflow with inputs...")
+        logging.info(f"🎲 Using seed: {job['seed']}")
+        updated_workflow = comfy_client.update_text_to_video_workflow(
+            workflow,
+            positive_prompt=job["prompt"],
+            negative_prompt=job["negative_prompt"],
+            width=args.width,
+            height=args.height,
+            frames=args.frames,
+            fps=args.fps,
+            seed=job["seed"],
+            steps=args.steps
+        )
+        
+        logging.info("🚀 Queueing workflow...")
+        prompt_id = comfy_client.queue_workflow(updated_workflow)
+        
+        if not prompt_id:
+            logging.error(f"❌ Failed to queue workflow for prompt: {job['prompt']}")
+            continue
+        
+        logging.info(f"✅ Workflow queued with ID: {prompt_id}")
+        queued.append((job, prompt_id))
+    
+    if not queued:
+        # The instance may have moved or stopped, so have the next run look the URL up again
+        c3_client.invalidate_comfyui_url()
+        logging.error("❌ Failed to queue workflow. Exiting.")
+        return 1
+    
+    # Steps 3-5: Wait for each workflow in submission order and retrieve its video
+    failures = len(jobs) - len(queued)
+    try:
+        for job, prompt_id in queued:
+            if wait_and_download(comfy_client, args, job, prompt_id, cache_executor, store_in_cache) != 0:
+                failures += 1
+    finally:
+        # Every cache write has been waited on by now unless we're leaving early (e.g. Ctrl-C),
+        # in which case don't start or wait for the rest
+        if cache_executor is not None:
+            cache_executor.shutdown(wait=False, cancel_futures=True)
+    
+    if len(jobs) > 1:
+        logging.info(f"📊 Generated {len(jobs) - failures} of {len(jobs)} videos")
+    
+    return 1 if failures else 0
+
 if __name__ == "__main__":
     try:
         sys.exit(main())